@@ -0,0 +1,162 @@
+'''Throughput benchmarks for the hot paths of the roulette simulation.
+
+Every benchmark is seeded, runs a fixed amount of work and reports the best
+rate over a few repeats, so results are comparable between runs on the same
+machine. Results are compared against a baseline stored in JSON, and any
+benchmark slower than TOLERANCE times its baseline rate is a regression.
+
+Usage:
+    python benchmark.py [--quick] [--baseline FILE]
+        runs the suite and compares it against the baseline
+    python benchmark.py --save [--baseline FILE]
+        runs the suite and stores the results as the new baseline
+'''
+import json
+import os
+import sys
+import timeit
+from roulette import (Wheel, BinBuilder, EuroBinBuilder,
+                      IntegerStatistics, SimulationBuilder)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "benchmark_baseline.json")
+TOLERANCE = 0.8
+SEED = 1
+
+def measure(func, count, repeat=5):
+    '''Returns the best rate of func over repeat runs, as count per second'''
+    return count / min(timeit.repeat(func, number=1, repeat=repeat))
+
+def bench_build_bins(builder, scale):
+    n = 20 * scale
+    def run():
+        for _ in range(n):
+            builder.build_bins(Wheel(rules=None))
+    return measure(run, n), "wheels/sec"
+
+def bench_wheel(rules, scale):
+    n = 200 * scale
+    def run():
+        # The layout is only loaded on first use, so spin once to time it.
+        for _ in range(n):
+            Wheel(SEED, rules).next()
+    return measure(run, n), "wheels/sec"
+
+def bench_wheel_next(scale):
+    n = 20000 * scale
+    wheel = Wheel(SEED)
+    def run():
+        for _ in range(n):
+            wheel.next()
+    return measure(run, n), "spins/sec"
+
+def bench_spin_batch(scale):
+    n = 20000 * scale
+    wheel = Wheel(SEED)
+    return measure(lambda: wheel.spin_batch(n), n), "spins/sec"
+
+def bench_cycle(mode, scale):
+    n = 5000 * scale
+    sb = SimulationBuilder(table_limit=1000, seed=SEED)
+    simulator = sb.get_simulator(mode)
+    player = simulator.player
+    # PlayerRandom bets its whole stake, which has to fit under the limit.
+    stake = 1000 if mode == "random" else 10**9
+    def run():
+        player.set_stake(stake)
+        player.set_rounds(10**9)
+        for _ in range(n):
+            simulator.game.cycle(player)
+    return measure(run, n), "spins/sec"
+
+def bench_gather(mode, samples, scale):
+    n = samples * scale
+    def run():
+        simulator = SimulationBuilder(table_limit=1000, seed=SEED).get_simulator(mode)
+        simulator.samples = n
+        simulator.gather()
+    return measure(run, n), "sessions/sec"
+
+def bench_stdev(scale):
+    n = 100000 * scale
+    wheel = Wheel(SEED)
+    sample = IntegerStatistics(wheel.spin_batch(n))
+    return measure(sample.stdev, n), "values/sec"
+
+BENCHMARKS = [
+    ("build_bins[american]", lambda scale: bench_build_bins(BinBuilder(), scale)),
+    ("build_bins[european]", lambda scale: bench_build_bins(EuroBinBuilder(), scale)),
+    ("wheel[american]", lambda scale: bench_wheel("american", scale)),
+    ("wheel[european]", lambda scale: bench_wheel("european", scale)),
+    ("wheel.next", bench_wheel_next),
+    ("wheel.spin_batch", bench_spin_batch),
+    ("cycle[martingale]", lambda scale: bench_cycle("martingale", scale)),
+    ("cycle[sevenreds]", lambda scale: bench_cycle("sevenreds", scale)),
+    ("cycle[passenger57]", lambda scale: bench_cycle("passenger57", scale)),
+    ("cycle[random]", lambda scale: bench_cycle("random", scale)),
+    ("gather[martingale,10]", lambda scale: bench_gather("martingale", 10, scale)),
+    ("gather[martingale,100]", lambda scale: bench_gather("martingale", 100, scale)),
+    ("gather[sevenreds,100]", lambda scale: bench_gather("sevenreds", 100, scale)),
+    ("gather[random,10]", lambda scale: bench_gather("random", 10, scale)),
+    ("stdev", bench_stdev),
+]
+
+def run(scale=1):
+    '''Runs every benchmark.
+
+    Returns:
+        dict : {name: [rate, unit]}
+    '''
+    results = {}
+    for name, bench in BENCHMARKS:
+        rate, unit = bench(scale)
+        results[name] = [rate, unit]
+    return results
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    '''Compares results against a baseline.
+
+    Returns:
+        1. Report lines, one per benchmark.
+        2. Names of the benchmarks that regressed.
+    '''
+    lines = []
+    regressions = []
+    for name, (rate, unit) in results.items():
+        line = "{:<26}{:>14,.0f} {}".format(name, rate, unit)
+        if name in baseline:
+            ratio = rate / baseline[name][0]
+            line += "  {:6.2f}x baseline".format(ratio)
+            if ratio < tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        lines.append(line)
+    return lines, regressions
+
+def main(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="store the results as the new baseline")
+    parser.add_argument("--quick", action="store_true",
+                        help="run a smaller workload")
+    args = parser.parse_args(argv)
+
+    results = run(scale=1 if args.quick else 5)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        lines, regressions = compare(results, {})
+    else:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        lines, regressions = compare(results, baseline)
+    print("\n".join(lines))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,170 @@
+'''On-disk cache of simulation results.
+
+Seeded simulations are deterministic, so the durations and maxima of a
+Simulator.gather only depend on its configuration, (mode, rules, rng
+backend, seed, table limit, initial stake, duration, samples, keep_values,
+workers), and on the simulation code. The number of workers is part of it
+because a parallel gather gives each of its shards its own substream.
+Entries are keyed by the SHA-256 of both, the code being fingerprinted by
+the contents of roulette.py and rng.py, so any change to the simulation
+invalidates every earlier result.
+
+Each entry is one pickle file named after its key. Entries are written to a
+temporary file in the cache directory and moved into place with os.replace,
+so concurrent worker processes only ever see whole entries, and two
+processes storing the same entry just replace one copy with another. Reading
+an entry updates its modification time, which eviction uses as the time it
+was last used.
+'''
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+import roulette
+import rng
+
+FINGERPRINT = None
+
+def fingerprint():
+    '''SHA-256 of the simulation code, computed once per process.'''
+    global FINGERPRINT
+    if FINGERPRINT is None:
+        code = hashlib.sha256()
+        for module in (roulette, rng):
+            with open(module.__file__, "rb") as f:
+                code.update(f.read())
+        FINGERPRINT = code.hexdigest()
+    return FINGERPRINT
+
+def configuration(simulator, workers=1):
+    '''Returns the configuration deciding simulator's results, or None.
+
+    Simulators without a seed, not built by SimulationBuilder, or spinning
+    anything but a seeded Wheel, such as a TapeWheel, have no configuration:
+    their results are not decided by the seed alone. A seed of 0 counts as
+    no seed, since SimulationBuilder seeds from fresh entropy for it.
+    '''
+    if not simulator.seed or simulator.mode is None:
+        return None
+    table = simulator.game.table
+    if type(table.wheel) is not roulette.Wheel:
+        return None
+    return (simulator.mode, table.wheel.rules, simulator.backend, simulator.seed,
+            table.limit, simulator.init_stake, simulator.init_duration,
+            simulator.samples, simulator.keep_values, workers)
+
+class ResultCache:
+    '''Directory of cached durations and maxima.
+
+    Parameters:
+        directory: where entries are stored, created if missing.
+        max_bytes: total size evict trims the entries to.
+        max_age: seconds since last use after which evict removes an entry.
+
+    Functions:
+        get: cached (durations, maxima) of a configuration, or None.
+        put: stores the (durations, maxima) of a configuration.
+        gather: runs Simulator.gather through the cache.
+        evict: removes expired entries, then least recently used entries
+            until the cache fits in max_bytes.
+    '''
+    SUFFIX = ".pickle"
+
+    def __init__(self, directory, max_bytes=1 << 30, max_age=30 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, config):
+        data = json.dumps([fingerprint(), list(config)])
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def path(self, config):
+        return os.path.join(self.directory, self.key(config) + self.SUFFIX)
+
+    def get(self, config):
+        path = self.path(config)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value
+
+    def put(self, config, value):
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.path(config))
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def gather(self, simulator, workers=1):
+        '''Simulator.gather, taking the results from the cache when it has them.
+
+        The sessions gathered are added to simulator's durations and maxima
+        either way. Results taken from the cache are not given to the
+        simulator's sink.
+
+        Returns:
+            bool : True if the results came from the cache
+        '''
+        config = configuration(simulator, workers)
+        if config is None:
+            simulator.gather(workers=workers)
+            return False
+        cached = self.get(config)
+        if cached is None:
+            durations, maxima = simulator.durations, simulator.maxima
+            simulator.durations, simulator.maxima = type(durations)(), type(maxima)()
+            try:
+                simulator.gather(workers=workers)
+                cached = simulator.durations, simulator.maxima
+                self.put(config, cached)
+            finally:
+                simulator.durations, simulator.maxima = durations, maxima
+            hit = False
+        else:
+            hit = True
+        simulator.durations.merge(cached[0])
+        simulator.maxima.merge(cached[1])
+        return hit
+
+    def entries(self):
+        '''Returns (last used, size, path) of every entry, oldest first.'''
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        '''Returns the number of entries removed.'''
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        expired = time.time() - self.max_age
+        removed = 0
+        for used, size, path in entries:
+            if used >= expired and total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Another process evicted it first.
+                pass
+            total -= size
+            removed += 1
+        return removed
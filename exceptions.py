@@ -1,3 +1,7 @@
 class InvalidBet(Exception):
     '''Exception for bets that violate Table rules.'''
-    pass
\ No newline at end of file
+    pass
+
+class TapeExhausted(Exception):
+    '''Exception for spinning past the end of a recorded spin tape.'''
+    pass
@@ -0,0 +1,119 @@
+'''Exact session statistics for deterministic betting strategies.
+
+Martingale and SevenReds only depend on the wheel through the chance of red,
+black and neither on each spin, so the distribution of their session
+duration and max stake can be computed exactly instead of sampled. The
+solver pushes the probability of every reachable state (stake, multiplier,
+red streak, max stake) forward one round at a time for init_duration
+rounds. It moves a state's probability into the results once the session
+ends there. The rules are the same as Simulator.session with the matching
+Player.
+'''
+from roulette import Wheel
+
+class Distribution(dict):
+    '''Probability of each value, with the same summaries as IntegerStatistics.
+
+    functions:
+        mean: sum(value * probability)
+        stdev: sqrt(sum((value - mean)^2 * probability))
+    '''
+    def mean(self):
+        return sum(x * p for x, p in self.items())
+
+    def stdev(self):
+        mean = self.mean()
+        return sum((x - mean)**2 * p for x, p in self.items())**.5
+
+class MarkovSolver:
+    '''Computes exact duration and max stake distributions of a strategy.
+
+    Parameters:
+        wheel: Wheel whose bins give the chance of red and black.
+        table_limit: table limit capping each bet.
+
+    Properties:
+        init_duration: max number of rounds to have Player play.
+        init_stake: starting stakes for Player.
+        durations: Distribution of how long Player was able to play.
+        maxima: Distribution of Player's max stake.
+    '''
+    MODES = ("martingale", "sevenreds")
+
+    def __init__(self, wheel, table_limit):
+        self.table_limit = table_limit
+        red, black = wheel.get_outcomes(("red", "black"))
+        bins = list(wheel.get_all_bins())
+        self.p_red = sum(red in b for b in bins) / len(bins)
+        self.p_black = sum(black in b for b in bins) / len(bins)
+        self.init_duration = 250
+        self.init_stake = 100
+        self.durations = Distribution()
+        self.maxima = Distribution()
+
+    def solve(self, mode):
+        '''Fills durations and maxima for the Player of the given mode.
+
+        Returns:
+            1. Distribution of durations.
+            2. Distribution of maxima.
+        '''
+        if mode not in self.MODES:
+            raise ValueError("no exact solution for mode {!r}".format(mode))
+        # Waiting for a streak only matters for SevenReds, so Martingale
+        # starts with its streak already reached.
+        wait = 7 if mode == "sevenreds" else 0
+        limit = self.table_limit
+        stake = self.init_stake
+        # Bets stop growing once 2**multiplier reaches the limit or the
+        # stake, so larger multipliers are merged into one state.
+        top = min(limit, stake).bit_length() if stake > 0 else 0
+        p_red, p_black = self.p_red, self.p_black
+        p_other = 1 - p_red - p_black
+
+        self.durations = Distribution()
+        self.maxima = Distribution()
+        states = {(stake, 0, 0, stake): 1.0}
+        if self.init_duration <= 0 or stake <= 0:
+            self.end(0, stake, 1.0)
+            return self.durations, self.maxima
+
+        for rounds in range(1, self.init_duration + 1):
+            after = {}
+            get = after.get
+            for state, p in states.items():
+                stake, multiplier, streak, maximum = state
+                if streak >= wait:
+                    amount = min(2**multiplier, limit, stake)
+                    won = (stake, 0, 0, maximum)
+                    after[won] = get(won, 0.0) + p * p_black
+                    lost = stake - amount
+                    multiplier = min(multiplier + 1, top)
+                    if lost <= 0:
+                        self.end(rounds, maximum, p * (p_red + p_other))
+                        continue
+                    red = (lost, multiplier, min(streak + 1, wait), maximum)
+                    other = (lost, multiplier, 0, maximum)
+                    q_other = p * p_other
+                else:
+                    red = (stake, multiplier, streak + 1, maximum)
+                    other = (stake, multiplier, 0, maximum)
+                    q_other = p * (p_black + p_other)
+                after[red] = get(red, 0.0) + p * p_red
+                after[other] = get(other, 0.0) + q_other
+            states = after
+        for state, p in states.items():
+            self.end(self.init_duration, state[3], p)
+        return self.durations, self.maxima
+
+    def end(self, duration, maximum, p):
+        if p:
+            self.durations[duration] = self.durations.get(duration, 0.0) + p
+            self.maxima[maximum] = self.maxima.get(maximum, 0.0) + p
+
+def solve(mode, table_limit, init_duration=250, init_stake=100, rules="american"):
+    '''Exact durations and maxima for the SimulationBuilder parameters.'''
+    solver = MarkovSolver(Wheel(rules=rules), table_limit)
+    solver.init_duration = init_duration
+    solver.init_stake = init_stake
+    return solver.solve(mode)
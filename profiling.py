@@ -0,0 +1,73 @@
+'''Profiling helpers for the roulette command line.
+
+cprofile dumps standard cProfile statistics, readable with pstats or
+snakeviz. collapsed writes one line per call stack with the microseconds
+spent in it, "outer;inner;innermost 1234", the input format of flamegraph.pl
+and speedscope.
+'''
+import sys
+from time import perf_counter
+
+def cprofile(func, path):
+    '''Runs func under cProfile and dumps the statistics to path.'''
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(path)
+
+class StackProfiler:
+    '''Records the time spent in every call stack of a run.
+
+    Installed with sys.setprofile, so it sees every Python and builtin call.
+    Time between two events is charged to the stack that was active, which
+    gives the exclusive time of each stack.
+
+    Properties:
+        stacks: dict of stack tuple (outermost frame first) to seconds.
+    '''
+    def __init__(self):
+        self.stacks = {}
+        self.keys = [()]
+        self.last = None
+
+    def label(self, frame):
+        code = frame.f_code
+        return "{}:{}".format(code.co_filename.rsplit("/", 1)[-1], code.co_name)
+
+    def event(self, frame, event, arg):
+        now = perf_counter()
+        key = self.keys[-1]
+        self.stacks[key] = self.stacks.get(key, 0.0) + now - self.last
+        if event == "call":
+            self.keys.append(key + (self.label(frame),))
+        elif event == "c_call":
+            self.keys.append(key + (getattr(arg, "__qualname__", repr(arg)),))
+        elif len(self.keys) > 1:
+            self.keys.pop()
+        self.last = perf_counter()
+
+    def runcall(self, func):
+        self.last = perf_counter()
+        sys.setprofile(self.event)
+        try:
+            return func()
+        finally:
+            sys.setprofile(None)
+
+    def lines(self):
+        '''Returns the collapsed stack lines, skipping stacks under 1us'''
+        return ["{} {}".format(";".join(key), int(seconds * 1e6))
+                for key, seconds in sorted(self.stacks.items())
+                if key and seconds >= 1e-6]
+
+def collapsed(func, path):
+    '''Runs func under a StackProfiler and writes collapsed stacks to path.'''
+    profiler = StackProfiler()
+    try:
+        return profiler.runcall(func)
+    finally:
+        with open(path, "w") as f:
+            f.write("\n".join(profiler.lines()) + "\n")
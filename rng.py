@@ -0,0 +1,131 @@
+'''Random number generator backends for Wheel, PlayerRandom and SimulationBuilder.
+
+A backend is any object with the methods the simulation calls:
+
+    randbelow(n): one int in [0, n), used by Wheel.next.
+    randbelow_batch(n, k): array('B') of k ints in [0, n), used by
+        Wheel.spin_batch. Drawing k at once must give the same values, and
+        leave the same state, as k calls to randbelow.
+    choices(population, k): k elements drawn with replacement.
+    getstate(), setstate(state): used by Wheel.checkpoint and Wheel.rewind.
+    spawn(n): n independent generators for substreams, e.g. one per worker.
+    spawn_seeds(seed, n): class method giving the seeds of n independent
+        generators, which can be pickled to worker processes.
+
+MersenneRNG is random.Random itself, so it gives the same spins as the
+simulation always has. PCG64RNG draws from NumPy's PCG64 Generator in blocks,
+and is only available when NumPy is installed.
+'''
+import random
+from array import array
+from itertools import repeat
+
+class MersenneRNG(random.Random):
+    '''The standard library Mersenne Twister, bit for bit.
+
+    randbelow is the rejection sampling behind randint, so randbelow(38)
+    draws exactly what randint(0, 37) does, without randint's argument
+    checks.
+    '''
+    randbelow = random.Random._randbelow
+
+    def randbelow_batch(self, n, k):
+        size = n.bit_length()
+        getrandbits = self.getrandbits
+        values = array('B')
+        while len(values) < k:
+            draws = map(getrandbits, repeat(size, k - len(values)))
+            values.extend(filter(n.__gt__, draws))
+        return values
+
+    def spawn(self, n):
+        return [MersenneRNG(self.getrandbits(64)) for _ in range(n)]
+
+    @classmethod
+    def spawn_seeds(cls, seed, n):
+        '''Seeds drawn from a generator seeded with seed, None gives fresh ones'''
+        rng = random.Random(seed)
+        return [rng.getrandbits(64) for _ in range(n)]
+
+class PCG64RNG:
+    '''NumPy's PCG64 Generator, drawing BLOCK values at a time.
+
+    Values below each n are drawn in blocks with one Generator.integers
+    call and handed out from a buffer, so randbelow and randbelow_batch
+    share one stream however the draws are split. Substreams are spawned
+    from the generator's SeedSequence, so they are independent of each other
+    and of the parent.
+
+    Parameters:
+        seed: int, None for fresh entropy, or a numpy SeedSequence.
+    '''
+    BLOCK = 4096
+
+    def __init__(self, seed=None):
+        import numpy
+
+        if isinstance(seed, numpy.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = numpy.random.SeedSequence(seed)
+        self.generator = numpy.random.Generator(numpy.random.PCG64(self.seed_sequence))
+        self.buffers = {}
+
+    def refill(self, n):
+        # Buffers are reversed, so values are handed out from the end.
+        buffer = self.generator.integers(0, n, self.BLOCK).tolist()
+        buffer.reverse()
+        self.buffers[n] = buffer
+        return buffer
+
+    def randbelow(self, n):
+        buffer = self.buffers.get(n)
+        if not buffer:
+            buffer = self.refill(n)
+        return buffer.pop()
+
+    def randbelow_batch(self, n, k):
+        values = array('B')
+        buffer = self.buffers.get(n) or self.refill(n)
+        while True:
+            take = min(k - len(values), len(buffer))
+            chunk = buffer[len(buffer) - take:]
+            del buffer[len(buffer) - take:]
+            chunk.reverse()
+            values.extend(chunk)
+            if len(values) == k:
+                return values
+            buffer = self.refill(n)
+
+    def choices(self, population, k=1):
+        return [population[i] for i in self.generator.integers(0, len(population), k).tolist()]
+
+    def getstate(self):
+        return (self.generator.bit_generator.state,
+                {n: list(buffer) for n, buffer in self.buffers.items()})
+
+    def setstate(self, state):
+        self.generator.bit_generator.state = state[0]
+        self.buffers = {n: list(buffer) for n, buffer in state[1].items()}
+
+    def spawn(self, n):
+        return [PCG64RNG(child) for child in self.seed_sequence.spawn(n)]
+
+    @classmethod
+    def spawn_seeds(cls, seed, n):
+        '''Child SeedSequences of seed, None gives fresh ones'''
+        import numpy
+
+        if not isinstance(seed, numpy.random.SeedSequence):
+            seed = numpy.random.SeedSequence(seed)
+        return seed.spawn(n)
+
+BACKENDS = {"mersenne": MersenneRNG, "pcg64": PCG64RNG}
+
+def make_rng(backend="mersenne", seed=None):
+    '''Returns a generator of the named backend seeded with seed'''
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError("unknown rng backend {!r}".format(backend)) from None
+    return cls(seed)
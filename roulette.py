@@ -1,9 +1,13 @@
-import random
+from array import array
+from operator import mul
+from time import perf_counter
 from exceptions import InvalidBet
-import pprint
+from rng import MersenneRNG, BACKENDS, make_rng
 import abc
 
 class Outcome:
+    __slots__ = ("name", "odds", "id")
+    
     def __init__(self, name, odds):
         '''Represents an Outcome, for handling bets
         
@@ -11,9 +15,12 @@ class Outcome:
             name: str
             odds: number
         
+        The id is a dense integer index assigned when the Outcome is added
+        to a Wheel, and is None until then.
         '''
         self.name = name
         self.odds = odds
+        self.id = None
     
     def __eq__(self, other):
         '''Return True if both Outcomes have the same name'''
@@ -39,6 +46,8 @@ class PrisonOutcome(Outcome):
     When Outcome is a PrisonOutcome, the 0 bin becomes a special case where 
     half the money is returned to the player for losing bets.
     '''
+    __slots__ = ()
+    
     def __repr__(self):
         return "PrisonOutcome({}, {})".format(self.name, self.odds)
     
@@ -46,54 +55,202 @@ class Bin(frozenset):
     '''Represents the 38 bins of the roulette wheel.
     
     Contains a collection of winning Outcomes for the corresponding bin.
+    
+    The Wheel also stores the bin as an integer bitmask of Outcome ids, so
+    checking a bet is a single AND instead of hashing the Outcome name. Bins
+    that were never added to a Wheel have an empty mask.
     '''
+    mask = 0
+    
     def get_outcome_iterator(self):
         return iter(self)
 
+def payout_rows(bins, outcomes):
+    '''Builds the payout matrix of a layout, see Wheel.payout_matrix'''
+    return [tuple(o.odds if b.mask >> o.id & 1 else
+                  o.odds * 0.5 if isinstance(o, PrisonOutcome) else 0
+                  for o in outcomes)
+            for b in bins]
+
 class Wheel:
     '''Manages and randomly selects a bin to simulate a roulette wheel.
     
+    The bins of the standard rule sets come from a shared, cached Layout, so
+    creating a Wheel copies a few references instead of rebuilding the bins.
+    Changes made with add_outcome and add_bin only affect this Wheel. The
+    layout is only fetched, and built if needed, the first time the bins or
+    outcomes are used, which keeps creating a Wheel cheap.
+    
     Properties:
+        rules: Rule set the bins were built for.
         bins: Contains bin instances.
-        rng: Random number generator used to select bins.
+        rng: Random number generator used to select bins, a backend from
+            the rng module, MersenneRNG seeded with seed unless given.
         all_outcomes: Set of all possible outcomes.
+        outcomes: List of all possible outcomes, indexed by Outcome id.
+        outcome_tuple: Immutable tuple of the same outcomes, see
+            get_outcome_tuple.
+        outcome_index: Dict of all possible outcomes, keyed by name.
+        payouts: Payout matrix of the layout, see payout_matrix.
     '''
     
-    def __init__(self, seed=None, rules="american"):
-        self.bins = [Bin([]) for _ in range(38)]
+    LAZY = frozenset(("bins", "outcomes", "outcome_tuple", "outcome_index", "payouts",
+                      "all_outcomes"))
     
-        self.rng = random.Random()
-        self.all_outcomes = set()
-        if seed:
-            self.rng.seed(seed)
-            
-        if rules == "american":
-            bb = BinBuilder()
-        elif rules == "european":
-            bb = EuroBinBuilder()
+    def __init__(self, seed=None, rules="american", rng=None):
+        self.rules = rules
+        self.rng = rng if rng is not None else MersenneRNG(seed or None)
+        
+    def __getattr__(self, name):
+        '''Loads the layout on first use of one of its attributes.
+        
+        Only called for attributes that are not set yet, so it costs nothing
+        once the layout is loaded.
+        '''
+        if name not in Wheel.LAZY:
+            raise AttributeError(name)
+        self.load_layout()
+        return getattr(self, name)
+    
+    def load_layout(self):
+        layout = get_layout(self.rules)
+        if layout:
+            self.bins = list(layout.bins)
+            self.outcomes = list(layout.outcomes)
+            self.outcome_tuple = layout.outcomes
+            self.outcome_index = dict(layout.outcome_index)
+            self.payouts = layout.payouts
         else:
-            bb = None
-                
-        if bb:
-            bb.build_bins(self)
+            self.bins = [Bin([]) for _ in range(38)]
+            self.outcomes = []
+            self.outcome_tuple = ()
+            self.outcome_index = {}
+            self.payouts = None
+        self.all_outcomes = set(self.outcomes)
         
     def add_outcome(self, bin, outcome):
-        if outcome not in self.all_outcomes:
+        oid = self.register(outcome)
+        old = self.bins[bin]
+        self.bins[bin] = Bin(old | {self.outcomes[oid]})
+        self.bins[bin].mask = old.mask | 1 << oid
+        self.payouts = None
+    
+    def register(self, outcome):
+        '''Assigns an Outcome its integer id on this wheel.
+        
+        New Outcomes get the next free id, Outcomes equal to one already on
+        the wheel share its id. Ids belong to one wheel, and the Outcomes of
+        a Layout are shared by every Wheel using it, so an Outcome already
+        numbered elsewhere is copied rather than renumbered.
+        
+        Returns:
+            int : the Outcome id
+        '''
+        oid = self.outcome_id(outcome)
+        if oid is None:
+            oid = len(self.outcomes)
+            if outcome.id is not None:
+                outcome = type(outcome)(outcome.name, outcome.odds)
+            outcome.id = oid
+            self.outcomes.append(outcome)
+            self.outcome_tuple = None
             self.all_outcomes.add(outcome)
-        self.bins[bin] = Bin(self.bins[bin] | Bin([outcome]))
+            self.outcome_index[outcome.name] = outcome
+        return oid
+    
+    def outcome_id(self, outcome):
+        '''Returns the id of an Outcome on this wheel, or None if not on the wheel'''
+        oid = outcome.id
+        if oid is not None and oid < len(self.outcomes) and \
+                self.outcomes[oid] == outcome:
+            return oid
+        known = self.outcome_index.get(outcome.name)
+        if known is None:
+            return None
+        return known.id
         
     def get_outcome(self, name):
-        outcome = [oc for oc in self.all_outcomes if oc.name == name]
-        if outcome:
-            return outcome[0]
+        return self.outcome_index.get(name)
+    
+    def get_outcomes(self, names):
+        '''Looks up several Outcomes by name at once.
         
-        return None
+        Returns:
+            list : the Outcome for each name, or None where it is not on the wheel
+        '''
+        return list(map(self.outcome_index.get, names))
     
     def add_bin(self, idx, bin):
-        self.bins[idx] = bin
+        '''Puts a copy of bin holding this wheel's own Outcomes at idx'''
+        outcomes = self.outcomes
+        ids = [self.register(outcome) for outcome in bin]
+        own = Bin(outcomes[oid] for oid in ids)
+        for oid in ids:
+            own.mask |= 1 << oid
+        self.bins[idx] = own
+        self.payouts = None
+    
+    def payout_matrix(self):
+        '''Returns what a bet of 1 on each Outcome pays for each bin.
+        
+        Row n holds the payouts when bin n comes up, indexed by Outcome id:
+        the odds for a winning Outcome, half the odds for a losing
+        PrisonOutcome and 0 otherwise, matching Player.win and Player.lose.
+        The matrix is kept until the layout changes.
+        
+        Returns:
+            list of tuples : one row per bin
+        '''
+        if self.payouts is None:
+            self.payouts = payout_rows(self.bins, self.outcomes)
+        return self.payouts
+    
+    def settle(self, vector, spins):
+        '''Settles a bet vector against each of a batch of spins.
+        
+        Parameters:
+            vector: amount bet on each Outcome, indexed by Outcome id
+            spins: bin indices, e.g. from spin_batch
+            
+        Returns:
+            list : total payout of the bet vector for each spin
+        '''
+        payouts = self.payout_matrix()
+        return [sum(map(mul, payouts[i], vector)) for i in spins]
     
     def next(self):
-        return self.bins[self.rng.randint(0,37)]
+        return self.bins[self.rng.randbelow(38)]
+    
+    def spin_batch(self, n):
+        '''Draws n spins at once and returns their bin indices.
+        
+        Every rng backend draws a batch exactly as it draws single values,
+        so for a given seed the indices match the bins n successive calls to
+        next() would select, and the rng is left in step for any next()
+        calls that follow.
+        
+        Returns:
+            array('B') of bin indices
+        '''
+        return self.rng.randbelow_batch(len(self.bins), n)
+    
+    def checkpoint(self):
+        '''Returns the state of the wheel's rng, to rewind to later'''
+        return self.rng.getstate()
+    
+    def rewind(self, checkpoint, spins=0):
+        '''Puts the rng back to checkpoint and draws spins spins from there.
+        
+        Lets a caller that drew a batch with spin_batch give back the spins
+        it did not use, leaving the rng as if only the others had been drawn.
+        '''
+        self.rng.setstate(checkpoint)
+        if spins:
+            self.spin_batch(spins)
+    
+    def bins_for(self, indices):
+        '''Returns the Bins for a sequence of bin indices, e.g. from spin_batch'''
+        return [self.bins[i] for i in indices]
     
     def get(self, idx):
         return self.bins[idx]
@@ -104,6 +261,16 @@ class Wheel:
     def get_all_outcomes(self):
         return self.all_outcomes
     
+    def get_outcome_tuple(self):
+        '''Returns all Outcomes as a tuple indexed by Outcome id.
+        
+        Unlike all_outcomes it can be indexed and sampled from directly. The
+        tuple is shared with the layout until an Outcome is added.
+        '''
+        if self.outcome_tuple is None:
+            self.outcome_tuple = tuple(self.outcomes)
+        return self.outcome_tuple
+    
 class BinBuilder:
     '''Adds winning Outcomes to each bin on the wheel'''
     def add_straight_bets(self, wheel):
@@ -320,6 +487,90 @@ class EuroBinBuilder(BinBuilder):
         '''Build bins as before, but add additional four bets'''
         super().build_bins(wheel)
         self.add_four_bets(wheel)
+        
+class LayoutBuilder:
+    '''Collects the bins of a layout from a BinBuilder before freezing it.
+    
+    Stands in for the Wheel that BinBuilder fills, but keeps each bin as a
+    mutable set of Outcome ids, so adding an Outcome does not rebuild a
+    frozenset. freeze turns the result into an immutable Layout.
+    '''
+    def __init__(self):
+        self.outcomes = []
+        self.outcome_index = {}
+        self.bins = [set() for _ in range(38)]
+        
+    def add_outcome(self, bin, outcome):
+        known = self.outcome_index.get(outcome.name)
+        if known is None:
+            outcome.id = len(self.outcomes)
+            self.outcomes.append(outcome)
+            self.outcome_index[outcome.name] = known = outcome
+        self.bins[bin].add(known.id)
+        
+    def freeze(self, rules):
+        masks = [sum(1 << oid for oid in ids) for ids in self.bins]
+        return Layout(rules, self.outcomes, masks)
+    
+class Layout:
+    '''Immutable bins, Outcomes and payout matrix of a rule set.
+    
+    Layouts are shared by every Wheel built for the same rules, so none of
+    their contents may be changed. They pickle as the name, odds and prison
+    flag of each Outcome plus one mask per bin, which lets worker processes
+    load a layout without running the BinBuilder.
+    
+    Properties:
+        rules: Name of the rule set.
+        outcomes: Tuple of all Outcomes, indexed by Outcome id.
+        outcome_index: Dict of all Outcomes, keyed by name.
+        bins: Tuple of Bins.
+        payouts: Payout matrix, see Wheel.payout_matrix.
+    '''
+    def __init__(self, rules, outcomes, masks):
+        self.rules = rules
+        self.outcomes = tuple(outcomes)
+        self.outcome_index = {o.name: o for o in self.outcomes}
+        bins = []
+        for mask in masks:
+            b = Bin(o for o in self.outcomes if mask >> o.id & 1)
+            b.mask = mask
+            bins.append(b)
+        self.bins = tuple(bins)
+        self.payouts = payout_rows(self.bins, self.outcomes)
+        
+    def __reduce__(self):
+        spec = [(o.name, o.odds, isinstance(o, PrisonOutcome)) for o in self.outcomes]
+        return load_layout, (self.rules, spec, [b.mask for b in self.bins])
+
+def load_layout(rules, spec, masks):
+    '''Rebuilds a pickled Layout from its Outcome spec and bin masks'''
+    outcomes = []
+    for oid, (name, odds, prison) in enumerate(spec):
+        outcome = PrisonOutcome(name, odds) if prison else Outcome(name, odds)
+        outcome.id = oid
+        outcomes.append(outcome)
+    return Layout(rules, outcomes, masks)
+
+LAYOUT_BUILDERS = {"american": BinBuilder, "european": EuroBinBuilder}
+LAYOUTS = {}
+
+def get_layout(rules):
+    '''Returns the cached Layout of a rule set, building it on first use.
+    
+    Returns None for rules without a BinBuilder, which give an empty wheel.
+    '''
+    layout = LAYOUTS.get(rules)
+    if layout is None and rules in LAYOUT_BUILDERS:
+        builder = LayoutBuilder()
+        LAYOUT_BUILDERS[rules]().build_bins(builder)
+        layout = LAYOUTS[rules] = builder.freeze(rules)
+    return layout
+
+def install_layouts(layouts):
+    '''Adds already built Layouts to the cache, e.g. in a worker process'''
+    for layout in layouts:
+        LAYOUTS[layout.rules] = layout
     
     
 class Bet:
@@ -364,67 +615,285 @@ class Table:
         limit: The table limit. Sum of all bets must not exceed this.
         minimum: The minimum bet allowed.
         bets: List of active bets.
+        total: Sum of all active bets, kept up to date by place_bet.
     '''
     def __init__(self, limit, wheel):
         self.limit = limit
         self.bets = []
         self.wheel = wheel
+        self.total = 0
         
     def place_bet(self, bet):
+        oid = self.wheel.outcome_id(bet.outcome)
+        if oid is None:
+            raise InvalidBet
+        # Bets are settled by the id of their Outcome, which is only right
+        # for this wheel's own Outcome object.
+        bet.outcome = self.wheel.outcomes[oid]
         self.bets.append(bet)
+        self.total += bet.amount
         if not self.is_valid():
             raise InvalidBet
     
     def __iter__(self):
         return iter(self.bets)
     
+    def __len__(self):
+        return len(self.bets)
+    
     def __str__(self):
+        import pprint
         return pprint.saferepr(self.bets)
     
     def __repr__(self):
         return "Table({})".format("".join((str(x) for x in self.bets)))
     
     def is_valid(self):
-        if sum(x.amount for x in self.bets) > self.limit:
+        if self.total > self.limit:
             return False
         return True
     
     def clear_bets(self):
-        self.bets = []
+        del self.bets[:]
+        self.total = 0
+    
+    def remove_bets(self, start):
+        '''Removes the bets placed after the first start bets.'''
+        for b in self.bets[start:]:
+            self.total -= b.amount
+        del self.bets[start:]
+    
+    def bet_vector(self):
+        '''Returns the amount bet on each Outcome, indexed by Outcome id'''
+        vector = [0] * len(self.wheel.outcomes)
+        for b in self.bets:
+            vector[b.outcome.id] += b.amount
+        return vector
+    
+    def settle(self, spins):
+        '''Returns the total payout of the active bets for each of spins'''
+        return self.wheel.settle(self.bet_vector(), spins)
+    
+class ArrayTable(Table):
+    '''Table that stores its bets as parallel typed arrays.
+    
+    Each bet is kept as its Outcome id and amount in two array('l') columns
+    that are emptied in place by clear_bets, so a cycle allocates no Bet
+    list. Amounts must be whole numbers of chips, and a bet over the limit
+    is taken off again before InvalidBet is raised. The bets property and
+    iteration rebuild Bet views from the columns, with the wheel's own
+    Outcome objects.
+    
+    Properties:
+        ids: Outcome id of each active bet.
+        amounts: amount of each active bet.
+    '''
+    def __init__(self, limit, wheel):
+        self.limit = limit
+        self.wheel = wheel
+        self.ids = array('l')
+        self.amounts = array('l')
+        self.total = 0
+        
+    @property
+    def bets(self):
+        outcomes = self.wheel.outcomes
+        return [Bet(amount, outcomes[oid]) for oid, amount in zip(self.ids, self.amounts)]
+    
+    def place_bet(self, bet):
+        oid = self.wheel.outcome_id(bet.outcome)
+        if oid is None:
+            raise InvalidBet
+        # The amount goes in first, since array('l') refuses amounts that are
+        # not whole numbers and the columns have to stay in step.
+        self.amounts.append(bet.amount)
+        self.ids.append(oid)
+        self.total += bet.amount
+        if not self.is_valid():
+            self.remove_bets(len(self.ids) - 1)
+            raise InvalidBet
+    
+    def __iter__(self):
+        outcomes = self.wheel.outcomes
+        for oid, amount in zip(self.ids, self.amounts):
+            yield Bet(amount, outcomes[oid])
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def clear_bets(self):
+        del self.ids[:]
+        del self.amounts[:]
+        self.total = 0
+    
+    def remove_bets(self, start):
+        self.total -= sum(self.amounts[start:])
+        del self.ids[start:]
+        del self.amounts[start:]
+    
+    def bet_vector(self):
+        vector = [0] * len(self.wheel.outcomes)
+        for oid, amount in zip(self.ids, self.amounts):
+            vector[oid] += amount
+        return vector
+    
+class Instrumentation:
+    '''Counts and times the phases of game cycles and simulator sessions.
     
+    Game and Simulator only record into an Instrumentation when one is set,
+    so an uninstrumented run pays a single attribute check per cycle.
+    
+    Properties:
+        counts: number of times each phase ran.
+        times: total seconds spent in each phase.
+    '''
+    PHASES = ("place_bets", "next", "winners", "settle", "clear_bets",
+              "cycle", "session")
+    
+    def __init__(self):
+        self.counts = dict.fromkeys(self.PHASES, 0)
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        
+    def add(self, phase, seconds):
+        self.counts[phase] += 1
+        self.times[phase] += seconds
+        
+    def report(self):
+        '''Returns a table of the calls, total and mean time of each phase'''
+        lines = ["{:<12}{:>10}{:>12}{:>12}".format("phase", "calls", "total s", "mean us")]
+        for phase in self.PHASES:
+            count = self.counts[phase]
+            total = self.times[phase]
+            mean = total / count * 1e6 if count else 0
+            lines.append("{:<12}{:>10}{:>12.4f}{:>12.2f}".format(phase, count, total, mean))
+        return "\n".join(lines)
+
 class Game:
     '''Manages game state.
     
     Properties:
         wheel: Wheel instance that selects random bins.
         table: Table instance which holds ongoing bets.
+        instrumentation: Instrumentation recording each cycle, or None.
     '''
     def __init__(self, table):
         self.table = table
+        self.instrumentation = None
         
     def cycle(self, player):
         '''Executes a single cycle of play with a given Player:
             1. Calls on Player to place bets.
             2. Retrieves winning Bin from Wheel
             3. Iterates over Table's Bets and call corresponding win/lose function
+        
+        A Bet wins when its Outcome's bit is set in the winning Bin's mask.
             
         Returns:
             1. Sum of win/loss amount for testing purposes.
             2. Number of bets for testing purposes.
         '''
+        if self.instrumentation is not None:
+            return self.instrumented_cycle(player)
+        if player.playing():
+            player.place_bets()
+        winning_outcomes = self.table.wheel.next()
+        player.winners(winning_outcomes)
+        mask = winning_outcomes.mask
+        bets = self.table.bets
+        total = 0
+        for b in bets:
+            if mask >> b.outcome.id & 1:
+                total += player.win(b)
+            else:
+                total += player.lose(b)
+        count = len(bets)
+        
+        self.table.clear_bets()
+        return total, count
+    
+    def cycle_all(self, players):
+        '''Executes a single cycle of play for several Players sharing the Table:
+            1. Calls on each Player to place bets, noting which bets are whose.
+            2. Retrieves one winning Bin from Wheel and reports it to every Player.
+            3. Settles the bets grouped by Outcome, testing each distinct
+               Outcome once, and calls the owning Player's win/lose function.
+        
+        All Players' bets count towards the same table limit. A Player whose
+        bets do not fit in the room left sits the round out: its bets are
+        taken off the table and its stake restored.
+        
+        Returns:
+            list : (sum of win/loss amount, number of bets) for each Player
+        '''
+        table = self.table
+        ends = []
+        for player in players:
+            if player.playing():
+                start, stake = len(table), player.stake
+                try:
+                    player.place_bets()
+                except InvalidBet:
+                    table.remove_bets(start)
+                    player.stake = stake
+            ends.append(len(table))
+
+        winning_outcomes = table.wheel.next()
+        for player in players:
+            player.winners(winning_outcomes)
+
+        groups = {}
+        bets = table.bets
+        owner = 0
+        for i, b in enumerate(bets):
+            while i >= ends[owner]:
+                owner += 1
+            groups.setdefault(b.outcome.id, []).append((owner, b))
+
+        mask = winning_outcomes.mask
+        totals = [0] * len(players)
+        counts = [0] * len(players)
+        for oid, group in groups.items():
+            won = mask >> oid & 1
+            for owner, b in group:
+                player = players[owner]
+                totals[owner] += player.win(b) if won else player.lose(b)
+                counts[owner] += 1
+
+        table.clear_bets()
+        return list(zip(totals, counts))
+    
+    def instrumented_cycle(self, player):
+        '''Same as cycle, but records the time of each phase.'''
+        add = self.instrumentation.add
+        start = t0 = perf_counter()
         if player.playing():
             player.place_bets()
+            t1 = perf_counter()
+            add("place_bets", t1 - t0)
+            t0 = t1
         winning_outcomes = self.table.wheel.next()
+        t1 = perf_counter()
+        add("next", t1 - t0)
         player.winners(winning_outcomes)
-        outcomes = []
-        for b in self.table.bets:
-            if b.outcome in winning_outcomes:
-                outcomes.append(player.win(b))
+        t0 = perf_counter()
+        add("winners", t0 - t1)
+        mask = winning_outcomes.mask
+        bets = self.table.bets
+        total = 0
+        for b in bets:
+            if mask >> b.outcome.id & 1:
+                total += player.win(b)
             else:
-                outcomes.append(player.lose(b))         
+                total += player.lose(b)
+        count = len(bets)
+        t1 = perf_counter()
+        add("settle", t1 - t0)
         
         self.table.clear_bets()
-        return sum(outcomes), len(outcomes)
+        t0 = perf_counter()
+        add("clear_bets", t0 - t1)
+        add("cycle", t0 - start)
+        return total, count
     
 class Player(abc.ABC):
     '''Abstract Player class.
@@ -436,6 +905,14 @@ class Player(abc.ABC):
     '''
     def __init__(self, table):
         self.table = table
+        self.reset()
+    
+    def reset(self):
+        '''Returns the Player to the start of a session.
+        
+        Simulator.session calls it before every session. Subclasses with
+        betting state of their own extend it.
+        '''
         self.stake = None
         self.rounds = None
     
@@ -455,7 +932,7 @@ class Player(abc.ABC):
         
     def lose(self, bet):
         if isinstance(bet.outcome, PrisonOutcome):
-            return bet.lose_amount * 0.5
+            return bet.lose_amount() * 0.5
         return 0
         
     def set_stake(self, stake):
@@ -498,8 +975,11 @@ class Martingale(Player):
     '''
     def __init__(self, table):
         super().__init__(table)
-        self.multiplier = 0
         self.black = table.wheel.get_outcome("black")
+    
+    def reset(self):
+        super().reset()
+        self.multiplier = 0
         
     def place_bets(self):
         amount = 2**self.multiplier
@@ -532,12 +1012,99 @@ class SevenReds(Martingale):
     Functions:
         place_bets: bets with the same strategy as martingale after 7 consecutive
             reds.
+        play: plays until the Player stops without a Game cycle per spin.
     '''
+    CHUNK = 4096
+    RUN = b"\x01" * 7
+    
     def __init__(self, table):
         super().__init__(table)
+        self.red, self.black = self.table.wheel.get_outcomes(("red", "black"))
+    
+    def reset(self):
+        super().reset()
         self.red_count = 0
-        self.red = self.table.wheel.get_outcome("red")
-        self.black = self.table.wheel.get_outcome("black")
+    
+    def play(self):
+        '''Plays rounds until the Player stops, skipping the spins it sits out.
+        
+        Leaves the Player and the wheel's rng exactly as calling Game.cycle
+        while playing() would, but most spins are never bet on. Spins are
+        drawn in batches with spin_batch and translated into a byte string
+        that is 1 for red, so the next 7 reds in a row are found with one
+        bytes.find and everything before them is skipped. Only the spins
+        after such a run go through the Martingale bet. When the stake runs
+        out part way through a batch, the wheel is rewound so that only the
+        spins played were drawn.
+        
+        Returns:
+            number of rounds played
+        '''
+        wheel = self.table.wheel
+        limit = self.table.limit
+        red, black = self.red.id, self.black.id
+        colours = bytes(b.mask >> red & 1 for b in wheel.bins).ljust(256, b"\0")
+        wins = bytes(b.mask >> black & 1 for b in wheel.bins)
+        run = self.RUN
+        
+        stake, multiplier, streak = self.stake, self.multiplier, self.red_count
+        rounds = self.rounds if self.playing() else 0
+        played = 0
+        while rounds > 0:
+            n = min(rounds, self.CHUNK)
+            checkpoint = wheel.checkpoint()
+            spins = wheel.spin_batch(n)
+            reds = spins.tobytes().translate(colours)
+            pos = 0
+            while pos < n:
+                if streak < 7:
+                    other = reds.find(b"\0", pos)
+                    if other < 0:
+                        other = n
+                    if streak + other - pos >= 7:
+                        pos += 7 - streak
+                    elif other == n:
+                        streak += n - pos
+                        break
+                    else:
+                        start = reds.find(run, other + 1)
+                        if start < 0:
+                            streak = n - 1 - reds.rfind(b"\0")
+                            break
+                        pos = start + 7
+                    streak = 7
+                    continue
+                
+                amount = 2**multiplier
+                if amount > limit:
+                    amount = limit
+                if amount > stake:
+                    amount = stake
+                if wins[spins[pos]]:
+                    multiplier = 0
+                else:
+                    multiplier += 1
+                    stake -= amount
+                streak = streak + 1 if reds[pos] else 0
+                pos += 1
+                if stake <= 0:
+                    break
+            else:
+                pos = n
+            
+            if stake <= 0:
+                if pos < n:
+                    wheel.rewind(checkpoint, pos)
+                played += pos
+                rounds -= pos
+                break
+            played += n
+            rounds -= n
+        
+        self.stake, self.multiplier, self.red_count = stake, multiplier, streak
+        if self.rounds:
+            self.rounds = rounds
+        return played
     
     def place_bets(self):
         multiplier = self.red_count - 7
@@ -557,19 +1124,29 @@ class PlayerRandom(Player):
     
     Strategy: Bets on random Outcome.
     
+    Outcomes are chosen BLOCK at a time from the wheel's outcome tuple with
+    one rng.choices call, and used up over the following rounds.
+    
     Functions:
-        place_bets: get all possible Outcomes and bet on 1 randomly.
+        place_bets: bet on the next randomly chosen Outcome.
     '''
-    def __init__(self, table, seed=None):
+    BLOCK = 256
+    
+    def __init__(self, table, seed=None, rng=None):
         super().__init__(table)
-        if seed:
-            self.rng = random.Random(seed)
-        else:
-            self.rng = random.Random()
+        self.rng = rng if rng is not None else MersenneRNG(seed or None)
+    
+    def reset(self):
+        # The rng is kept, so a seeded Player's stream carries on.
+        super().reset()
+        self.choices = iter(())
             
     def place_bets(self):
-        all_outcomes = self.table.wheel.get_all_outcomes()
-        outcome = self.rng.sample(all_outcomes, 1)[0]
+        outcome = next(self.choices, None)
+        if outcome is None:
+            outcomes = self.table.wheel.get_outcome_tuple()
+            self.choices = iter(self.rng.choices(outcomes, k=self.BLOCK))
+            outcome = next(self.choices)
         bet = Bet(self.stake, outcome)
         
         self.table.place_bet(bet)
@@ -587,44 +1164,247 @@ class Simulator:
         maxima: list of Player's max stake in each simulation
         player: Player strategy to use.
         game: Game to simulate.
+        mode: Player mode the simulator was built with, set by SimulationBuilder.
+        seed: seed the simulator was built with, set by SimulationBuilder.
+        backend: name of the rng backend the simulator was built with.
+        keep_values: store every duration and maximum (IntegerStatistics), or
+            only their running statistics (RunningStatistics).
+        instrumentation: Instrumentation recording sessions and cycles, or None.
+        sink: object with an add method, such as a warehouse.Warehouse, that is
+            given (strategy, seed, table limit, stake, duration, max stake,
+            final stake) for every session, or None.
+        fast: play SevenReds sessions without history with SevenReds.play,
+            which gives the same results without a Game cycle per spin.
     
     Methods:
         session: initializes Player with initial settings and executes game
             cycles until Player stops playing. Saves duration played as well as
-            max stake. Returns stake history for testing.
-        gather: executes session the number of times specified in samples.
+            max stake. Returns stake history for testing, or a summary of the
+            session when no history is kept.
+        gather: executes session the number of times specified in samples,
+            optionally sharded across worker processes.
     '''
-    def __init__(self, game, player):
+    def __init__(self, game, player, keep_values=True):
         self.init_duration = 250
         self.init_stake = 100
         self.samples = 50
-        self.durations = IntegerStatistics()
-        self.maxima = IntegerStatistics()
+        self.keep_values = keep_values
+        statistics = IntegerStatistics if keep_values else RunningStatistics
+        self.durations = statistics()
+        self.maxima = statistics()
         self.player = player
         self.game = game
+        self.mode = None
+        self.seed = None
+        self.backend = "mersenne"
+        self.instrumentation = None
+        self.sink = None
+        self.fast = True
+        
+    def instrument(self, instrumentation):
+        '''Records sessions and game cycles into instrumentation, None to stop'''
+        self.instrumentation = instrumentation
+        self.game.instrumentation = instrumentation
     
-    def session(self):
-        self.player.__init__(self.player.table)
-        self.player.set_rounds(self.init_duration)
-        self.player.set_stake(self.init_stake)
+    def session(self, history=True):
+        '''Plays one session and records its duration and max stake.
+        
+        The max stake and the largest drop from it (drawdown) are tracked as
+        the session goes, so the stake history is only kept when asked for.
         
-        stakes = [self.player.stake]
+        Parameters:
+            history: True keeps the stake history in a list, "array" keeps it
+                in an array('l'), False keeps no history.
+                
+        Returns:
+            the stake history, or (duration, max stake, final stake, drawdown)
+            when history is False
+        '''
+        start = perf_counter() if self.instrumentation is not None else None
+        player = self.player
+        player.reset()
+        player.set_rounds(self.init_duration)
+        player.set_stake(self.init_stake)
+        
+        stake = maximum = player.stake
+        drawdown = 0
+        if history == "array":
+            stakes = array('l', [stake])
+        elif history:
+            stakes = [stake]
         duration = 0
-        while self.player.playing():
-            self.game.cycle(self.player)
-            stakes.append(self.player.stake)
+        if self.fast and not history and start is None and \
+                type(player) is SevenReds and type(self.game.table.wheel) is Wheel:
+            duration = player.play()
+            # A won bet only hands its amount back, so the stake never rises.
+            stake = player.stake
+            drawdown = maximum - stake
+        while player.playing():
+            self.game.cycle(player)
+            stake = player.stake
+            if stake > maximum:
+                maximum = stake
+            elif maximum - stake > drawdown:
+                drawdown = maximum - stake
+            if history:
+                stakes.append(stake)
             duration += 1
         self.durations.append(duration)
-        self.maxima.append(max(stakes))
+        self.maxima.append(maximum)
+        if self.sink is not None:
+            self.sink.add((self.mode or type(player).__name__, self.seed,
+                           self.game.table.limit, self.init_stake,
+                           duration, maximum, stake))
+        if start is not None:
+            self.instrumentation.add("session", perf_counter() - start)
         
-        return stakes
+        if history:
+            return stakes
+        return duration, maximum, stake, drawdown
     
-    def gather(self, debug=False):
+    def gather(self, debug=False, workers=1):
+        if workers > 1:
+            return self.gather_parallel(workers)
         for _ in range(self.samples):    
             if debug:
                 print(self.session())
             else:
-                self.session()
+                self.session(history=False)
+    
+    def gather_until(self, width, budget=None, confidence=0.95, batch=50,
+                     max_samples=None):
+        '''Runs sessions until the estimates are precise enough.
+        
+        Sessions are run in batches, and after each batch the confidence
+        intervals of mean duration and mean maximum are checked. Stops once
+        both are at most width wide, once budget seconds have passed, or once
+        max_samples sessions have been gathered, whichever comes first.
+        
+        Returns:
+            dict : the final estimates, see estimates
+        '''
+        deadline = None if budget is None else perf_counter() + budget
+        # Stored values take O(n) per stdev, so the checks are made on running
+        # statistics fed with each batch instead.
+        durations, maxima = self.durations, self.maxima
+        if self.keep_values:
+            durations, maxima = RunningStatistics(durations), RunningStatistics(maxima)
+        while True:
+            start = len(self.durations)
+            for _ in range(batch):
+                self.session(history=False)
+            if self.keep_values:
+                durations.extend(self.durations[start:])
+                maxima.extend(self.maxima[start:])
+            estimates = self.estimates(confidence, durations, maxima)
+            if max(estimates["durations"][1], estimates["maxima"][1]) * 2 <= width:
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                break
+            if max_samples is not None and estimates["samples"] >= max_samples:
+                break
+        return estimates
+    
+    def estimates(self, confidence=0.95, durations=None, maxima=None):
+        '''Returns the current estimates and how precise they are.
+        
+        Parameters:
+            durations, maxima: statistics to estimate from, by default the
+                simulator's own.
+                
+        Returns:
+            dict : number of samples, and (mean, half width of the confidence
+                interval) of durations and of maxima. The half width is
+                infinite with fewer than 2 samples.
+        '''
+        from statistics import NormalDist
+        
+        if durations is None:
+            durations, maxima = self.durations, self.maxima
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        n = len(durations)
+        estimates = {"samples": n}
+        for name, values in (("durations", durations), ("maxima", maxima)):
+            mean = values.mean() if n else float("nan")
+            half = z * values.stdev() / n**.5 if n > 1 else float("inf")
+            estimates[name] = (mean, half)
+        return estimates
+    
+    def gather_parallel(self, workers):
+        '''Shards the samples across a pool of worker processes.
+        
+        Each worker rebuilds the simulation from mode and table limit with its
+        own seed, derived from the simulator's seed by the rng backend's
+        spawn_seeds, so the same seed and number of workers always give the
+        same durations and maxima. Shard results are merged in shard order.
+        When the sink is a Warehouse, each worker writes its sessions to the
+        same database itself.
+        '''
+        from concurrent.futures import ProcessPoolExecutor
+        
+        if self.mode is None:
+            raise ValueError("parallel gather needs a Simulator built by SimulationBuilder "
+                             "with its own seeded Wheel")
+        
+        sink = getattr(self.sink, "path", None)
+        if self.sink is not None and sink is None:
+            raise ValueError("parallel gather can only share a Warehouse sink")
+        if sink is not None:
+            # Workers are forked, so the Warehouse must not be mid-write.
+            self.sink.sync()
+            sink = (sink, self.seed)
+        
+        size, extra = divmod(self.samples, workers)
+        seeds = BACKENDS[self.backend].spawn_seeds(self.seed, workers)
+        shards = [(self.mode, self.game.table.limit, seed, self.init_duration,
+                   self.init_stake, size + (i < extra), self.keep_values, sink,
+                   self.backend)
+                  for i, seed in enumerate(seeds)]
+        
+        layouts = list(LAYOUTS.values())
+        with ProcessPoolExecutor(max_workers=workers, initializer=install_layouts,
+                                 initargs=(layouts,)) as pool:
+            for durations, maxima in pool.map(gather_shard, shards):
+                self.durations.merge(durations)
+                self.maxima.merge(maxima)
+    
+def derive_seeds(seed, n):
+    '''Derives n independent seeds from a top-level seed.
+    
+    Seeds are drawn from a generator seeded with seed, so they are the same
+    for the same seed. A seed of None gives fresh, unreproducible seeds.
+    '''
+    return MersenneRNG.spawn_seeds(seed, n)
+    
+def gather_shard(shard):
+    '''Worker side of Simulator.gather_parallel.
+    
+    Parameters:
+        shard: (mode, table_limit, seed, init_duration, init_stake, samples,
+            keep_values, sink, backend), sink being None or the (database
+            path, seed) of the run's Warehouse
+        
+    Returns:
+        durations and maxima of the shard's sessions
+    '''
+    (mode, table_limit, seed, init_duration, init_stake, samples, keep_values,
+     sink, backend) = shard
+    simulator = SimulationBuilder(table_limit, seed, backend=backend).get_simulator(
+        mode, keep_values)
+    simulator.init_duration = init_duration
+    simulator.init_stake = init_stake
+    simulator.samples = samples
+    if sink is None:
+        simulator.gather()
+        return simulator.durations, simulator.maxima
+    
+    from warehouse import Warehouse
+    
+    # Rows record the seed of the whole run, which the shard seed derives from.
+    path, simulator.seed = sink
+    with Warehouse(path) as simulator.sink:
+        simulator.gather()
+    return simulator.durations, simulator.maxima
                 
 class IntegerStatistics(list):
     '''Extension of List class to calculate statistical summaries.
@@ -637,7 +1417,157 @@ class IntegerStatistics(list):
         return sum(self)/len(self)
 
     def stdev(self):
-        return (sum((x - self.mean())**2 for x in self)/(len(self) -1 ))**.5
+        mean = self.mean()
+        return (sum((x - mean)**2 for x in self)/(len(self) -1 ))**.5
+    
+    def merge(self, other):
+        '''Adds the values of another IntegerStatistics, e.g. from a worker'''
+        self.extend(other)
+    
+class RunningStatistics:
+    '''Streaming version of IntegerStatistics that does not store the values.
+    
+    Keeps the count, total, running mean, sum of squared deviations (M2),
+    minimum and maximum up to date as values arrive (Welford's method), so
+    memory use does not grow with the number of values and stdev is O(1).
+    The mean is taken from the exact total rather than the running mean.
+    
+    functions:
+        mean: sum of values / number of values
+        stdev: sqrt(M2/(number of values -1))
+        merge: combines the statistics of values gathered separately
+    '''
+    def __init__(self, values=()):
+        self.count = 0
+        self.total = 0
+        self.mean_ = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.extend(values)
+        
+    def __len__(self):
+        return self.count
+    
+    def append(self, x):
+        self.count += 1
+        self.total += x
+        delta = x - self.mean_
+        self.mean_ += delta / self.count
+        self.m2 += delta * (x - self.mean_)
+        if self.minimum is None or x < self.minimum:
+            self.minimum = x
+        if self.maximum is None or x > self.maximum:
+            self.maximum = x
+            
+    def extend(self, values):
+        for x in values:
+            self.append(x)
+    
+    def mean(self):
+        return self.total/self.count
+    
+    def stdev(self):
+        return (self.m2/(self.count - 1))**.5
+    
+    def merge(self, other):
+        '''Adds the statistics of another RunningStatistics, e.g. from a worker'''
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.total = other.count, other.total
+            self.mean_, self.m2 = other.mean_, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean_ - self.mean_
+        self.mean_ += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+            
+class MartingaleEngine:
+    '''Simulates many Martingale sessions together in lockstep.
+    
+    Gives the same durations and maxima statistics as a Simulator running a
+    Martingale, without a Player object or Game.cycle call per round. The
+    stake, multiplier and maximum stake of every session are kept in typed
+    arrays, and every round each unfinished session places one bet on a spin
+    drawn for it with a single Wheel.spin_batch call. Sessions drop out of the
+    active list once they run out of stake or rounds, and since all sessions
+    start together the rounds left are the same for every active session.
+    
+    Parameters:
+        table: Table supplying the wheel and the table limit.
+        flat: bet base every round, like Passenger57, instead of doubling
+            after each loss.
+        outcome: name of the Outcome to bet on.
+    
+    Properties:
+        base: bet placed after a win, or every round when flat.
+        init_duration: max number of rounds in each session.
+        init_stake: starting stake of each session.
+        samples: number of sessions to simulate.
+        durations: list of how long each session lasted.
+        maxima: list of the max stake in each session.
+    '''
+    def __init__(self, table, flat=False, outcome="black"):
+        self.table = table
+        self.flat = flat
+        self.outcome = table.wheel.get_outcome(outcome)
+        self.base = 1
+        self.init_duration = 250
+        self.init_stake = 100
+        self.samples = 50
+        self.durations = IntegerStatistics()
+        self.maxima = IntegerStatistics()
+        
+    def gather(self):
+        wheel = self.table.wheel
+        limit = self.table.limit
+        base = self.base
+        flat = self.flat
+        wins = bytes(b.mask >> self.outcome.id & 1 for b in wheel.bins)
+        
+        n = self.samples
+        stakes = array('l', [self.init_stake]) * n
+        multipliers = array('l', [0]) * n
+        maxima = array('l', stakes)
+        durations = array('l', [0]) * n
+        
+        active = list(range(n)) if self.init_duration > 0 and self.init_stake > 0 else []
+        rounds = 0
+        while active:
+            rounds += 1
+            last_round = rounds >= self.init_duration
+            playing = []
+            for i, spin in zip(active, wheel.spin_batch(len(active))):
+                stake = stakes[i]
+                amount = base if flat else base * 2**multipliers[i]
+                if amount > limit:
+                    amount = limit
+                if amount > stake:
+                    amount = stake
+                
+                if wins[spin]:
+                    multipliers[i] = 0
+                else:
+                    multipliers[i] += 1
+                    stake -= amount
+                    stakes[i] = stake
+                
+                if stake > maxima[i]:
+                    maxima[i] = stake
+                if stake > 0 and not last_round:
+                    playing.append(i)
+                else:
+                    durations[i] = rounds
+            active = playing
+        
+        self.durations.extend(durations)
+        self.maxima.extend(maxima)
             
 class SimulationBuilder():
     '''Wrapper to build simulators
@@ -649,31 +1579,48 @@ class SimulationBuilder():
         4. Game    
     
     SimulationBuilder builds everything up the Player, which may change.
+    A ready-made wheel, such as a tape.TapeWheel replaying recorded spins,
+    can be passed in place of a new seeded Wheel. Its simulators are left
+    without a mode, since they cannot be rebuilt from mode and seed, so
+    parallel gather refuses them. backend names the rng module backend the
+    Wheel and PlayerRandom draw from. The Mersenne Twister keeps the
+    simulation's original streams, seeding both alike; other backends give
+    each its own substream of the seed.
     
     Functions:
         get_simulator: takes a Player mode as input and returns the simulator
             with the desired betting strategy.
     '''
-    def __init__(self, table_limit, seed=None):
+    def __init__(self, table_limit, seed=None, wheel=None, backend="mersenne"):
         self.seed = seed
-        if self.seed:
-            wheel = Wheel(seed)
+        self.backend = backend
+        self.injected = wheel is not None
+        if backend == "mersenne":
+            wheel_seed = self.player_seed = seed or None
         else:
-            wheel = Wheel()
+            wheel_seed, self.player_seed = BACKENDS[backend].spawn_seeds(seed or None, 2)
+        if wheel is None:
+            wheel = Wheel(rng=make_rng(backend, wheel_seed))
             
         table = Table(table_limit, wheel)
         
         self.game = Game(table)
-        self.pb = PlayerBuilder(table)
+        self.pb = PlayerBuilder(table, backend)
         
-    def get_simulator(self, mode):
-        simulator = Simulator(self.game, self.pb.get_player(mode, self.seed))
+    def get_simulator(self, mode, keep_values=True):
+        simulator = Simulator(self.game, self.pb.get_player(mode, self.player_seed),
+                              keep_values)
+        if not self.injected:
+            simulator.mode = mode
+        simulator.seed = self.seed
+        simulator.backend = self.backend
         return simulator
     
 class PlayerBuilder():
     '''Wrapper to build Players from Table'''
-    def __init__(self, table):
+    def __init__(self, table, backend="mersenne"):
         self.table = table
+        self.backend = backend
     def get_player(self, mode, seed):
         if mode == "martingale":
             return Martingale(self.table)
@@ -682,15 +1629,58 @@ class PlayerBuilder():
         elif mode == "passenger57":
             return Passenger57(self.table)
         elif mode == "random":
-            return PlayerRandom(self.table, seed)
+            return PlayerRandom(self.table, seed, make_rng(self.backend, seed or None))
         else:
             raise ValueError
 
     
             
-if __name__ == "__main__":
-    sb = SimulationBuilder(table_limit=1000)
-    simulator = sb.get_simulator("sevenreds")
-    simulator.gather(debug=False)
+def main(argv=None):
+    '''Runs a simulation from the command line and prints its statistics.'''
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Simulate a roulette betting strategy.")
+    parser.add_argument("--mode", default="sevenreds",
+                        choices=["martingale", "sevenreds", "passenger57", "random"])
+    parser.add_argument("--table-limit", type=int, default=1000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--rng", default="mersenne", choices=sorted(BACKENDS),
+                        help="random number generator backend")
+    parser.add_argument("--samples", type=int)
+    parser.add_argument("--instrument", action="store_true",
+                        help="print the time spent in each phase of a cycle")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="dump cProfile stats of the run to FILE")
+    parser.add_argument("--collapsed", metavar="FILE",
+                        help="write collapsed stacks of the run to FILE, for flame graphs")
+    parser.add_argument("--warehouse", metavar="FILE",
+                        help="store every session's results in the SQLite database FILE")
+    args = parser.parse_args(argv)
+    
+    sb = SimulationBuilder(table_limit=args.table_limit, seed=args.seed, backend=args.rng)
+    simulator = sb.get_simulator(args.mode)
+    if args.samples is not None:
+        simulator.samples = args.samples
+    if args.instrument:
+        simulator.instrument(Instrumentation())
+    if args.warehouse:
+        from warehouse import Warehouse
+        simulator.sink = Warehouse(args.warehouse)
+        
+    if args.profile or args.collapsed:
+        import profiling
+        if args.profile:
+            profiling.cprofile(simulator.gather, args.profile)
+        else:
+            profiling.collapsed(simulator.gather, args.collapsed)
+    else:
+        simulator.gather(debug=False)
+    if simulator.sink is not None:
+        simulator.sink.close()
     print(simulator.durations)
-    print(simulator.maxima)
\ No newline at end of file
+    print(simulator.maxima)
+    if args.instrument:
+        print(simulator.instrumentation.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+'''Asyncio game server hosting many live roulette tables in one process.
+
+Every table is a Wheel, Table and Game spun by its own task on a timer, so
+thousands of tables share one event loop instead of a thread each. Clients
+connect over a local TCP socket and speak newline-delimited JSON:
+
+    {"op": "bet", "table": 3, "outcome": "black", "amount": 10}
+        queues a bet for the next spin of table 3 and is answered with
+        {"event": "bet", "id": 17} or {"event": "error", "error": "..."}
+    {"op": "tables"}
+        is answered with {"event": "tables", "tables": 1000, "limit": 1000}
+
+Bets are only queued when they arrive. At each spin the table validates the
+whole batch against its limit, in arrival order, and settles it in one
+Game.cycle. Each client then gets one message per table listing its bets:
+
+    {"event": "spin", "table": 3, "bin": 26,
+     "bets": [{"id": 17, "won": false, "payout": 0}],
+     "rejected": [18]}
+
+Replies to a client's requests wait until the client has read enough of its
+earlier messages. Table tasks never wait for a client: a client that leaves
+more than HIGH_WATER bytes of spin messages unread is disconnected.
+'''
+import asyncio
+import json
+from roulette import Wheel, Table, Game, Player, Bet, derive_seeds
+
+# Bytes of unread messages after which a client is disconnected.
+HIGH_WATER = 1 << 20
+
+class LiveWheel(Wheel):
+    '''Wheel that remembers the index of the bin it spun last.
+
+    Properties:
+        last: index of the last bin returned by next.
+    '''
+    last = None
+
+    def next(self):
+        self.last = self.rng.randbelow(38)
+        return self.bins[self.last]
+
+class BetQueue(Player):
+    '''Player standing in for all the clients betting at one table.
+
+    Collects the bets clients send between spins, places the ones that fit
+    under the table limit when Game.cycle asks for bets, and records each
+    bet's result for the client that made it.
+
+    Properties:
+        pending: (client, bet id, Bet) waiting for the next spin.
+        placed: client and bet id of each Bet on the table, by Bet identity.
+        rejected: client and bet id of bets that did not fit under the limit.
+        results: (client, bet id, won, payout) of the last spin.
+        winning_bin: Bin of the last spin.
+    '''
+    def __init__(self, table):
+        super().__init__(table)
+        self.pending = []
+        self.placed = {}
+        self.rejected = []
+        self.results = []
+        self.winning_bin = None
+
+    def playing(self):
+        return bool(self.pending)
+
+    def place_bets(self):
+        table = self.table
+        for client, bet_id, bet in self.pending:
+            if table.total + bet.amount > table.limit:
+                self.rejected.append((client, bet_id))
+                continue
+            table.place_bet(bet)
+            self.placed[id(bet)] = (client, bet_id)
+        self.pending = []
+
+    def winners(self, winners):
+        self.winning_bin = winners
+
+    def win(self, bet):
+        payout = super().win(bet)
+        self.results.append(self.placed.pop(id(bet)) + (True, payout))
+        return payout
+
+    def lose(self, bet):
+        payout = super().lose(bet)
+        self.results.append(self.placed.pop(id(bet)) + (False, payout))
+        return payout
+
+class LiveTable:
+    '''One table of the server, spun by its own task.
+
+    Properties:
+        number: index of the table on the server.
+        wheel, table, game: the table's simulation objects.
+        queue: BetQueue collecting the clients' bets.
+        spins: number of spins so far.
+    '''
+    def __init__(self, number, limit, seed=None, rules="american"):
+        self.number = number
+        self.wheel = LiveWheel(seed, rules)
+        self.table = Table(limit, self.wheel)
+        self.game = Game(self.table)
+        self.queue = BetQueue(self.table)
+        self.spins = 0
+
+    def spin(self):
+        '''Settles the queued bets against one spin.
+
+        Returns:
+            dict : message for each client that had bets, keyed by client
+        '''
+        queue = self.queue
+        self.game.cycle(queue)
+        self.spins += 1
+
+        messages = {}
+        def message(client):
+            if client not in messages:
+                messages[client] = {"event": "spin", "table": self.number,
+                                    "bin": self.wheel.last,
+                                    "bets": [], "rejected": []}
+            return messages[client]
+        for client, bet_id, won, payout in queue.results:
+            message(client)["bets"].append({"id": bet_id, "won": won, "payout": payout})
+        for client, bet_id in queue.rejected:
+            message(client)["rejected"].append(bet_id)
+        queue.results = []
+        queue.rejected = []
+        return messages
+
+class GameServer:
+    '''Hosts many LiveTables and the clients betting on them.
+
+    Parameters:
+        tables: number of tables.
+        limit: table limit of every table.
+        interval: seconds between spins of each table.
+        seed: top-level seed, each table's wheel gets a seed derived from it.
+        rules: wheel rules of every table.
+    '''
+    def __init__(self, tables=1, limit=1000, interval=1.0, seed=None, rules="american"):
+        self.interval = interval
+        self.limit = limit
+        self.tables = [LiveTable(n, limit, table_seed, rules)
+                       for n, table_seed in enumerate(derive_seeds(seed, tables))]
+        self.next_id = 0
+        self.server = None
+        self.tasks = []
+        # Handler task of each connected client, by its writer.
+        self.clients = {}
+
+    async def start(self, host="127.0.0.1", port=0):
+        '''Starts listening and spinning.
+
+        Returns:
+            (host, port) the server listens on
+        '''
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.tasks = [asyncio.create_task(self.run_table(t)) for t in self.tables]
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.server.close()
+        handlers = list(self.clients.values())
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def run_table(self, live):
+        while True:
+            await asyncio.sleep(self.interval)
+            for client, message in live.spin().items():
+                push(client, message)
+
+    async def handle(self, reader, writer):
+        self.clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError:
+                    await skip_line(reader)
+                    await send(writer, {"event": "error", "error": "line too long"})
+                    continue
+                try:
+                    reply = self.request(writer, json.loads(line))
+                except (ValueError, KeyError, TypeError, IndexError) as e:
+                    reply = {"event": "error", "error": str(e) or type(e).__name__}
+                await send(writer, reply)
+        except ConnectionError:
+            pass
+        finally:
+            del self.clients[writer]
+            writer.close()
+
+    def request(self, client, message):
+        op = message["op"]
+        if op == "tables":
+            return {"event": "tables", "tables": len(self.tables), "limit": self.limit}
+        if op != "bet":
+            raise ValueError("unknown op {!r}".format(op))
+
+        number = message["table"]
+        if not isinstance(number, int) or not 0 <= number < len(self.tables):
+            raise ValueError("no table {!r}".format(number))
+        live = self.tables[number]
+        outcome = live.wheel.get_outcome(message["outcome"])
+        amount = message["amount"]
+        if outcome is None:
+            raise ValueError("unknown outcome {!r}".format(message["outcome"]))
+        if isinstance(amount, bool) or not isinstance(amount, int) or amount <= 0:
+            raise ValueError("amount must be a positive whole number")
+        self.next_id += 1
+        live.queue.pending.append((client, self.next_id, Bet(amount, outcome)))
+        return {"event": "bet", "id": self.next_id}
+
+    async def serve(self, host="127.0.0.1", port=0):
+        '''Starts the server and runs until cancelled.'''
+        await self.start(host, port)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+async def skip_line(reader):
+    '''Discards input up to the end of a line over the reader's limit.'''
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+async def send(writer, message):
+    '''Writes message to a client and waits until the client catches up.'''
+    if not writer.is_closing():
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+
+def push(writer, message):
+    '''Writes message to a client without waiting, disconnecting clients
+    that have fallen more than HIGH_WATER bytes behind.'''
+    if writer.is_closing():
+        return
+    if writer.transport.get_write_buffer_size() > HIGH_WATER:
+        writer.close()
+        return
+    writer.write(json.dumps(message).encode() + b"\n")
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve live roulette tables.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--tables", type=int, default=1)
+    parser.add_argument("--table-limit", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between spins of each table")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--rules", default="american", choices=["american", "european"])
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.tables, args.table_limit, args.interval, args.seed, args.rules)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
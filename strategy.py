@@ -0,0 +1,249 @@
+'''Betting strategies described as data instead of Player subclasses.
+
+A Strategy lists what a betting system does: the Outcome it bets on, the
+streak that has to come up before it bets, how the bet changes after a win
+and after a loss, and when it stops. It compiles to one small state machine
+(stake, next bet, streak) that runs two ways:
+
+    SpecPlayer plays it through the Game/Player interface, one Game.cycle per
+        spin, and behaves exactly like the hand written Player it describes.
+    SpecEngine plays many sessions of it in lockstep over typed arrays, like
+        MartingaleEngine, drawing each round's spins with one spin_batch.
+
+Strategies are plain keyword arguments, so they can be stored as JSON:
+
+    Strategy(**{"trigger": "red", "streak": 7})   # SevenReds
+'''
+from array import array
+from roulette import Player, Bet, Simulator, Game, Table, Wheel, IntegerStatistics
+
+def progression(name, base):
+    '''Returns the function giving the next bet from the current one'''
+    if name == "same":
+        return lambda bet: bet
+    if name == "reset":
+        return lambda bet: base
+    if name == "double":
+        return lambda bet: bet * 2
+    if name == "increase":
+        return lambda bet: bet + base
+    if name == "decrease":
+        return lambda bet: bet - base if bet > base else base
+    raise ValueError("unknown progression {!r}".format(name))
+
+class Strategy:
+    '''Declarative description of a betting system.
+
+    Parameters:
+        outcome: name of the Outcome bet on.
+        base: first bet, and the step of increase and decrease.
+        on_win, on_loss: how the next bet follows from the last one, one of
+            PROGRESSIONS. Bets are capped by the table limit and the stake
+            when placed, but the progression continues from the uncapped bet.
+        trigger: name of an Outcome that has to win streak spins in a row
+            before any bet is placed, None to bet every round.
+        streak: length of the trigger streak.
+        target: stop once the stake reaches target, None to never stop early.
+        floor: stop once the stake is at or below floor.
+        pay_odds: credit the odds on a won bet. False only returns the bet,
+            which is how Martingale and SevenReds settle.
+    '''
+    PROGRESSIONS = ("same", "reset", "double", "increase", "decrease")
+
+    def __init__(self, outcome="black", base=1, on_win="reset", on_loss="double",
+                 trigger=None, streak=0, target=None, floor=0, pay_odds=False):
+        for name in (on_win, on_loss):
+            if name not in self.PROGRESSIONS:
+                raise ValueError("unknown progression {!r}".format(name))
+        self.outcome = outcome
+        self.base = base
+        self.on_win = on_win
+        self.on_loss = on_loss
+        self.trigger = trigger
+        self.streak = streak if trigger is not None else 0
+        self.target = target
+        self.floor = floor
+        self.pay_odds = pay_odds
+
+    def compile(self, wheel):
+        '''Resolves the strategy against the Outcomes of wheel.'''
+        return Program(self, wheel)
+
+STRATEGIES = {
+    "martingale": Strategy(),
+    "sevenreds": Strategy(trigger="red", streak=7),
+    "flat": Strategy(on_loss="same"),
+    "paroli": Strategy(on_win="double", on_loss="reset"),
+    "dalembert": Strategy(on_win="decrease", on_loss="increase"),
+}
+
+class Program:
+    '''A Strategy compiled for one wheel.
+
+    Properties:
+        outcome: Outcome bet on.
+        trigger: Outcome of the trigger streak, or None.
+        wins: byte per bin, 1 where the bet wins.
+        triggers: byte per bin, 1 where the trigger Outcome comes up.
+        payout: stake credited per unit of a won bet.
+        after_win, after_loss: next bet from the current one.
+    '''
+    def __init__(self, strategy, wheel):
+        self.strategy = strategy
+        self.outcome = wheel.get_outcome(strategy.outcome)
+        self.trigger = None
+        if strategy.trigger is not None:
+            self.trigger = wheel.get_outcome(strategy.trigger)
+        if self.outcome is None:
+            raise ValueError("no outcome {!r} on the wheel".format(strategy.outcome))
+        if strategy.trigger is not None and self.trigger is None:
+            raise ValueError("no outcome {!r} on the wheel".format(strategy.trigger))
+        self.wins = bytes(b.mask >> self.outcome.id & 1 for b in wheel.bins)
+        self.triggers = (bytes(b.mask >> self.trigger.id & 1 for b in wheel.bins)
+                         if self.trigger is not None else bytes(len(wheel.bins)))
+        self.payout = 1 + self.outcome.odds if strategy.pay_odds else 1
+        self.after_win = progression(strategy.on_win, strategy.base)
+        self.after_loss = progression(strategy.on_loss, strategy.base)
+
+    def playing(self, stake):
+        target = self.strategy.target
+        return stake > self.strategy.floor and (target is None or stake < target)
+
+class SpecPlayer(Player):
+    '''Player that follows a Strategy.
+
+    Properties:
+        strategy: Strategy played.
+        program: the Strategy compiled for the table's wheel.
+        bet: uncapped amount of the next bet.
+        streak: current run of the trigger Outcome.
+    '''
+    def __init__(self, table, strategy):
+        self.strategy = strategy
+        self.program = strategy.compile(table.wheel)
+        super().__init__(table)
+    
+    def reset(self):
+        super().reset()
+        self.bet = self.strategy.base
+        self.streak = 0
+
+    def playing(self):
+        return super().playing() and self.program.playing(self.stake)
+
+    def place_bets(self):
+        if self.streak < self.strategy.streak:
+            return
+        amount = self.bet
+        if amount > self.table.limit:
+            amount = self.table.limit
+        if amount > self.stake:
+            amount = self.stake
+        self.stake -= amount
+        self.table.place_bet(Bet(amount, self.program.outcome))
+
+    def win(self, bet):
+        self.stake += bet.amount * self.program.payout
+        self.bet = self.program.after_win(self.bet)
+        return super().win(bet)
+
+    def lose(self, bet):
+        self.bet = self.program.after_loss(self.bet)
+        return super().lose(bet)
+
+    def winners(self, winners):
+        super().winners(winners)
+        if self.program.trigger is not None:
+            if winners.mask >> self.program.trigger.id & 1:
+                self.streak += 1
+            else:
+                self.streak = 0
+
+class SpecEngine:
+    '''Simulates many sessions of a Strategy together in lockstep.
+
+    The compiled strategy as a batched kernel: the stake, streak, maximum
+    and next bet of every session are kept in arrays, and each round every
+    unfinished session is advanced on a spin drawn for it with one
+    Wheel.spin_batch call. Sessions waiting for their trigger only update
+    their streak. Gives the same statistics as a Simulator with a
+    SpecPlayer, and for the martingale strategy the same sessions as
+    MartingaleEngine.
+
+    Parameters:
+        table: Table supplying the wheel and the table limit.
+        strategy: Strategy to play.
+
+    Properties:
+        init_duration: max number of rounds in each session.
+        init_stake: starting stake of each session.
+        samples: number of sessions to simulate.
+        durations: list of how long each session lasted.
+        maxima: list of the max stake in each session.
+    '''
+    def __init__(self, table, strategy):
+        self.table = table
+        self.strategy = strategy
+        self.program = strategy.compile(table.wheel)
+        self.init_duration = 250
+        self.init_stake = 100
+        self.samples = 50
+        self.durations = IntegerStatistics()
+        self.maxima = IntegerStatistics()
+
+    def gather(self):
+        program = self.program
+        wheel = self.table.wheel
+        limit = self.table.limit
+        wins, triggers, payout = program.wins, program.triggers, program.payout
+        after_win, after_loss = program.after_win, program.after_loss
+        streak_needed = self.strategy.streak
+        playing = program.playing
+
+        n = self.samples
+        stakes = array('l', [self.init_stake]) * n
+        streaks = array('l', [0]) * n
+        maxima = array('l', stakes)
+        durations = array('l', [0]) * n
+        bets = [self.strategy.base] * n
+
+        active = list(range(n)) if self.init_duration > 0 and self.init_stake > 0 \
+            and playing(self.init_stake) else []
+        rounds = 0
+        while active:
+            rounds += 1
+            last_round = rounds >= self.init_duration
+            still = []
+            for i, spin in zip(active, wheel.spin_batch(len(active))):
+                stake = stakes[i]
+                if streaks[i] >= streak_needed:
+                    bet = bets[i]
+                    amount = bet if bet < limit else limit
+                    if amount > stake:
+                        amount = stake
+                    if wins[spin]:
+                        stake += amount * (payout - 1)
+                        bets[i] = after_win(bet)
+                    else:
+                        stake -= amount
+                        bets[i] = after_loss(bet)
+                    stakes[i] = stake
+                    if stake > maxima[i]:
+                        maxima[i] = stake
+                streaks[i] = streaks[i] + 1 if triggers[spin] else 0
+
+                if stake > 0 and not last_round and playing(stake):
+                    still.append(i)
+                else:
+                    durations[i] = rounds
+            active = still
+
+        self.durations.extend(durations)
+        self.maxima.extend(maxima)
+
+def simulator(strategy, table_limit, seed=None, rules="american"):
+    '''Returns a Simulator playing strategy with a SpecPlayer.'''
+    table = Table(table_limit, Wheel(seed, rules))
+    simulator = Simulator(Game(table), SpecPlayer(table, strategy))
+    simulator.seed = seed
+    return simulator
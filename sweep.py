@@ -0,0 +1,162 @@
+'''Parameter sweep over strategies, table limits, stakes, durations and samples.
+
+Every combination of the grids given on the command line is one cell. Cells
+are simulated on a pool of worker processes, each cell with its own seed
+derived from --seed, and the results table is written as CSV once all cells
+are done. With --cache, cells already simulated with the same code are read
+from an on-disk cache, so re-running a mostly unchanged sweep only
+simulates the changed cells:
+
+    python sweep.py --modes martingale sevenreds --table-limits 100 1000 \\
+        --stakes 100 500 --samples 1000 --workers 8 --output sweep.csv
+'''
+import csv
+import hashlib
+import json
+import sys
+from itertools import product
+from exceptions import InvalidBet
+from roulette import SimulationBuilder, LAYOUTS, get_layout, install_layouts, derive_seeds
+
+# Passenger57 plays until it is stopped from outside, so it has no sessions
+# to sweep.
+MODES = ("martingale", "sevenreds", "random")
+
+COLUMNS = ("mode", "table_limit", "stake", "duration", "samples", "seed",
+           "mean_duration", "stdev_duration", "mean_maximum", "stdev_maximum",
+           "max_maximum", "error")
+
+def cell_seed(seed, config):
+    '''Returns the seed of the cell with config, (mode, table_limit, stake,
+    duration, samples), in a sweep seeded with seed.
+
+    The seed is a hash of seed and config, so a cell keeps its seed, and its
+    cached results, when values are added to or removed from the grids. A
+    seed of None gives a fresh seed.
+    '''
+    if seed is None:
+        return derive_seeds(None, 1)[0]
+    data = json.dumps([seed] + list(config)).encode()
+    return int.from_bytes(hashlib.sha256(data).digest()[:8], "big")
+
+def cells(modes, table_limits, stakes, durations, samples, seed=None):
+    '''Returns the (mode, table_limit, stake, duration, samples, seed) cells.
+
+    The same grids and seed always give the same results however the cells
+    are scheduled, see cell_seed.
+    '''
+    return [config + (cell_seed(seed, config),)
+            for config in product(modes, table_limits, stakes, durations, samples)]
+
+def run_cell(cell, cache=None):
+    '''Simulates one cell, or takes its results from cache, a cache.ResultCache.
+
+    Cells the table refuses to play, such as random with a stake over the
+    table limit, get no statistics and the error instead, so one bad cell
+    does not end the sweep.
+
+    Returns:
+        tuple : the cell followed by its statistics, in COLUMNS order
+    '''
+    mode, table_limit, stake, duration, samples, seed = cell
+    simulator = SimulationBuilder(table_limit, seed).get_simulator(mode, keep_values=False)
+    simulator.init_stake = stake
+    simulator.init_duration = duration
+    simulator.samples = samples
+    try:
+        if cache is None:
+            simulator.gather()
+        else:
+            cache.gather(simulator)
+    except InvalidBet:
+        return cell + (None,) * 5 + ("bet over the table limit",)
+    durations, maxima = simulator.durations, simulator.maxima
+    if not samples:
+        return cell + (None,) * 6
+    stdev = (lambda values: values.stdev()) if samples > 1 else (lambda values: 0.0)
+    return cell + (durations.mean(), stdev(durations),
+                   maxima.mean(), stdev(maxima), maxima.maximum, None)
+
+def run(cells, workers=1, progress=None, cache=None):
+    '''Simulates cells, on a pool of worker processes when workers > 1.
+
+    Parameters:
+        progress: called with (cells done, total cells) after each cell.
+        cache: cache.ResultCache shared by all workers, or None.
+
+    Returns:
+        list : run_cell result of every cell, in the order of cells
+    '''
+    results = [None] * len(cells)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Layouts are built on first use, so build the one workers need
+        # before handing the cached layouts to them.
+        get_layout("american")
+        with ProcessPoolExecutor(max_workers=workers, initializer=install_layouts,
+                                 initargs=(list(LAYOUTS.values()),)) as pool:
+            futures = {pool.submit(run_cell, cell, cache): i for i, cell in enumerate(cells)}
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done, len(cells))
+    else:
+        for i, cell in enumerate(cells):
+            results[i] = run_cell(cell, cache)
+            if progress is not None:
+                progress(i + 1, len(cells))
+    return results
+
+def write(results, f):
+    '''Writes the results table as CSV to the open file f.'''
+    writer = csv.writer(f)
+    writer.writerow(COLUMNS)
+    writer.writerows(results)
+
+def report(done, total):
+    sys.stderr.write("\r{}/{} cells".format(done, total))
+    if done == total:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep roulette strategies over a parameter grid.")
+    parser.add_argument("--modes", nargs="+", default=["martingale", "sevenreds"],
+                        choices=MODES)
+    parser.add_argument("--table-limits", nargs="+", type=int, default=[1000])
+    parser.add_argument("--stakes", nargs="+", type=int, default=[100])
+    parser.add_argument("--durations", nargs="+", type=int, default=[250])
+    parser.add_argument("--samples", nargs="+", type=int, default=[50])
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the results table to FILE instead of stdout")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="reuse the results of cells cached in DIR")
+    parser.add_argument("--cache-size", type=int, default=1 << 30,
+                        help="bytes the cache is trimmed to after the sweep")
+    parser.add_argument("--cache-age", type=float, default=30,
+                        help="days after which unused cache entries are removed")
+    parser.add_argument("--quiet", action="store_true", help="do not show progress")
+    args = parser.parse_args(argv)
+
+    grid = cells(args.modes, args.table_limits, args.stakes, args.durations,
+                 args.samples, args.seed)
+    cache = None
+    if args.cache:
+        from cache import ResultCache
+        cache = ResultCache(args.cache, args.cache_size, args.cache_age * 24 * 3600)
+    results = run(grid, args.workers, None if args.quiet else report, cache)
+    if cache is not None:
+        cache.evict()
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write(results, f)
+    else:
+        write(results, sys.stdout)
+
+if __name__ == "__main__":
+    main()
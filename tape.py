@@ -0,0 +1,115 @@
+'''Recording spin sequences to tape files and replaying them.
+
+A tape is a 16 byte header followed by one byte per spin, the index of the
+winning bin. Tapes are read through a read-only memory map, so any number of
+processes replaying the same tape share the operating system's page cache
+instead of each holding the sequence in memory, and no RNG runs on replay.
+Replaying one tape for several strategies compares them on identical spins
+(common random numbers).
+
+Header layout, little-endian:
+    magic   4 bytes  b"SPIN"
+    version 1 byte   1
+    bins    1 byte   number of bins on the recording wheel
+    unused  2 bytes
+    count   8 bytes  number of spins
+'''
+import mmap
+import struct
+from exceptions import TapeExhausted
+from roulette import Wheel
+
+MAGIC = b"SPIN"
+VERSION = 1
+HEADER = struct.Struct("<4sBBxxQ")
+
+def record(wheel, n, path, chunk=1 << 20):
+    '''Draws n spins from wheel and writes them to a tape file at path.'''
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(wheel.bins), n))
+        left = n
+        while left > 0:
+            spins = wheel.spin_batch(min(chunk, left))
+            spins.tofile(f)
+            left -= len(spins)
+
+class SpinTape:
+    '''Read-only, memory-mapped view of a tape file.
+
+    Properties:
+        bins: number of bins on the recording wheel.
+        spins: memoryview of the recorded bin indices.
+    '''
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.map.close()
+            raise ValueError("{} is truncated".format(path))
+        magic, version, self.bins, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError("{} is not a version {} spin tape".format(path, VERSION))
+        if len(self.map) < HEADER.size + count:
+            self.map.close()
+            raise ValueError("{} is truncated".format(path))
+        self.spins = memoryview(self.map)[HEADER.size:HEADER.size + count]
+
+    def __len__(self):
+        return len(self.spins)
+
+    def close(self):
+        self.spins.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TapeWheel(Wheel):
+    '''Wheel that replays the spins of a tape instead of drawing them.
+
+    Parameters:
+        tape: SpinTape to replay.
+        start: index of the first spin to replay, so workers can replay
+            different parts of one tape.
+        rules: rules of the layout the bin indices refer to.
+
+    Properties:
+        position: index of the next spin on the tape.
+    '''
+    def __init__(self, tape, start=0, rules="american"):
+        super().__init__(rules=rules)
+        if tape.bins != len(self.bins):
+            raise ValueError("tape was recorded on a wheel with {} bins".format(tape.bins))
+        self.tape = tape
+        self.position = start
+        # Spins come from the tape, so the rng Wheel set up is never drawn from.
+        self.rng = None
+
+    def next(self):
+        try:
+            spin = self.tape.spins[self.position]
+        except IndexError:
+            raise TapeExhausted from None
+        self.position += 1
+        return self.bins[spin]
+
+    def spin_batch(self, n):
+        '''Returns the next n spins as a zero-copy view of the tape.'''
+        end = self.position + n
+        if end > len(self.tape):
+            raise TapeExhausted
+        spins = self.tape.spins[self.position:end]
+        self.position = end
+        return spins
+
+    def checkpoint(self):
+        '''Returns the position on the tape, to rewind to later'''
+        return self.position
+
+    def rewind(self, checkpoint, spins=0):
+        '''Moves back to checkpoint, then past the spins spins used since.'''
+        self.position = checkpoint + spins
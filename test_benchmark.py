@@ -0,0 +1,18 @@
+import benchmark
+
+def test_run():
+    '''Checks that every benchmark runs and reports a positive rate.'''
+    results = benchmark.run(scale=1)
+    assert list(results) == [name for name, _ in benchmark.BENCHMARKS]
+    for rate, unit in results.values():
+        assert rate > 0
+        assert unit.endswith("/sec")
+        
+def test_compare():
+    '''Checks that only benchmarks below tolerance of baseline regress.'''
+    results = {"fast": [100, "spins/sec"], "slow": [50, "spins/sec"], 
+               "new": [10, "spins/sec"]}
+    baseline = {"fast": [90, "spins/sec"], "slow": [100, "spins/sec"]}
+    lines, regressions = benchmark.compare(results, baseline, tolerance=0.8)
+    assert len(lines) == 3
+    assert regressions == ["slow"]
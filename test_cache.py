@@ -0,0 +1,84 @@
+import os
+import time
+from roulette import SimulationBuilder, Wheel
+from cache import ResultCache, configuration
+from tape import record, SpinTape, TapeWheel
+import sweep
+
+class TestResultCache:
+    '''Checks cache hits, keys and eviction.'''
+    def simulator(self, seed=1, samples=10):
+        simulator = SimulationBuilder(table_limit=100, seed=seed).get_simulator("martingale")
+        simulator.samples = samples
+        return simulator
+    
+    def test_gather(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        live = self.simulator()
+        live.gather()
+        
+        first, second = self.simulator(), self.simulator()
+        assert not cache.gather(first)
+        assert cache.gather(second)
+        assert first.durations == second.durations == live.durations
+        assert second.maxima == live.maxima
+        
+    def test_key(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        config = configuration(self.simulator())
+        assert config == ("martingale", "american", "mersenne", 1, 100, 100, 250, 10, True, 1)
+        assert cache.key(config) == cache.key(configuration(self.simulator()))
+        assert cache.key(config) != cache.key(configuration(self.simulator(seed=2)))
+        assert cache.key(config) != cache.key(configuration(self.simulator(samples=11)))
+        assert cache.key(config) != cache.key(configuration(self.simulator(), workers=2))
+        
+    def test_tape_wheel(self, tmp_path):
+        '''Simulators replaying a tape are never cached.'''
+        path = str(tmp_path / "spins.tape")
+        record(Wheel(1), 1000, path)
+        with SpinTape(path) as tape:
+            builder = SimulationBuilder(table_limit=100, seed=1, wheel=TapeWheel(tape))
+            simulator = builder.get_simulator("martingale")
+            simulator.mode = "martingale"
+            assert configuration(simulator) is None
+        
+    def test_unseeded(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        simulator = SimulationBuilder(table_limit=100).get_simulator("martingale")
+        simulator.samples = 3
+        assert not cache.gather(simulator)
+        assert len(simulator.durations) == 3
+        assert cache.entries() == []
+    
+    def test_seed_zero(self, tmp_path):
+        '''Seed 0 draws fresh entropy, so its results are not cached.'''
+        cache = ResultCache(str(tmp_path))
+        assert configuration(self.simulator(seed=0)) is None
+        assert not cache.gather(self.simulator(seed=0))
+        assert cache.entries() == []
+        
+    def test_evict(self, tmp_path):
+        cache = ResultCache(str(tmp_path), max_bytes=10**6, max_age=3600)
+        for seed in range(4):
+            cache.put(("config", seed), list(range(100)))
+        paths = [path for _, _, path in cache.entries()]
+        old = time.time() - 7200
+        os.utime(paths[0], (old, old))
+        assert cache.evict() == 1
+        assert len(cache.entries()) == 3
+        
+        cache.max_bytes = os.path.getsize(paths[1]) * 2
+        time.sleep(0.01)
+        assert cache.get(("config", 1)) is not None
+        assert cache.evict() == 1
+        assert cache.get(("config", 2)) is None
+        assert cache.get(("config", 1)) is not None
+        assert len(cache.entries()) == 2
+        
+    def test_sweep(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        cells = sweep.cells(["martingale", "sevenreds"], [100], [50], [100], [5], seed=2)
+        uncached = sweep.run(cells)
+        assert sweep.run(cells, workers=2, cache=cache) == uncached
+        assert len(cache.entries()) == 2
+        assert sweep.run(cells, cache=cache) == uncached
@@ -12,4 +12,11 @@ class TestEuroBinBuilder(unittest.TestCase):
         self.assertIsNone(self.wheel.get_outcome("00-0-1-2-3"))
         
     def test_four_bets(self):
-        self.assertIsNotNone(self.wheel.get_outcome("0-1-2-3"))
\ No newline at end of file
+        self.assertIsNotNone(self.wheel.get_outcome("0-1-2-3"))
+        
+    def test_prison_payouts(self):
+        '''Losing bets on the PrisonOutcome return half their lose amount'''
+        prison = self.wheel.get_outcome("0")
+        payouts = self.wheel.payout_matrix()
+        self.assertEqual(payouts[0][prison.id], 35)
+        self.assertEqual(payouts[5][prison.id], 17.5)
@@ -1,4 +1,5 @@
-from roulette import Game, Passenger57, Table, Wheel, SimulationBuilder
+from roulette import (Game, Passenger57, Martingale, SevenReds, PlayerRandom, Table,
+                      ArrayTable, Wheel, SimulationBuilder, Instrumentation)
 
 class TestGame:    
     def setup_method(self):
@@ -44,4 +45,63 @@ class TestGame:
             assert simulator.player.rounds == num_rounds
             simulator.game.cycle(simulator.player)
             num_rounds -= 1
-        
\ No newline at end of file
+            
+    def test_instrumented_cycle(self):
+        '''Checks that instrumented cycles play the same and count each phase'''
+        table = Table(100, Wheel(seed=self.random_seed))
+        game = Game(table)
+        game.instrumentation = Instrumentation()
+        player = Passenger57(table)
+        
+        for _ in range(5):
+            assert game.cycle(player) == self.g.cycle(self.p)
+        for phase in ("place_bets", "next", "winners", "settle", "clear_bets", "cycle"):
+            assert game.instrumentation.counts[phase] == 5
+        assert game.instrumentation.times["cycle"] > 0
+        assert game.instrumentation.counts["session"] == 0
+        
+    def test_cycle_all(self):
+        '''Checks that players sharing a table play as they would alone.'''
+        classes = [Martingale, SevenReds, Passenger57, Martingale]
+        table = Table(1000, Wheel(seed=self.random_seed))
+        game = Game(table)
+        players = [cls(table) for cls in classes]
+        
+        alone = []
+        for cls in classes:
+            t = Table(1000, Wheel(seed=self.random_seed))
+            alone.append((Game(t), cls(t)))
+            
+        for p in players + [p for _, p in alone]:
+            p.set_stake(100)
+            p.set_rounds(50)
+        
+        for _ in range(50):
+            results = game.cycle_all(players)
+            assert results == [g.cycle(p) for g, p in alone]
+            assert len(table.bets) == 0
+        for p, (_, q) in zip(players, alone):
+            assert (p.stake, p.rounds) == (q.stake, q.rounds)
+        
+    def test_cycle_all_limit(self):
+        '''Checks that players whose bets do not fit sit the round out.'''
+        for cls in (Table, ArrayTable):
+            table = cls(10, Wheel(seed=1))
+            game = Game(table)
+            players = [Martingale(table), Martingale(table), PlayerRandom(table, seed=1),
+                       Martingale(table)]
+            for p in players:
+                p.set_stake(100)
+                p.set_rounds(100)
+            players[2].set_stake(5)
+            
+            refused = 0
+            for _ in range(100):
+                stakes = [p.stake if p.playing() else None for p in players]
+                results = game.cycle_all(players)
+                assert len(table) == 0 and table.total == 0
+                for p, stake, (_, count) in zip(players, stakes, results):
+                    if stake is not None and not count:
+                        assert p.stake == stake
+                        refused += 1
+            assert refused > 0
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+HEAVY = ["pprint", "dataclasses", "inspect", "argparse", "concurrent.futures",
+         "multiprocessing", "cProfile", "profiling", "numpy"]
+BUDGET_US = 100000
+
+def import_roulette():
+    '''Imports roulette in a fresh interpreter.
+    
+    Returns:
+        1. Names of the modules loaded after the import.
+        2. Cumulative import time of roulette in microseconds.
+    '''
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "import sys, roulette; print(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+    line = [l for l in result.stderr.splitlines() if l.rstrip().endswith("| roulette")][0]
+    return result.stdout.split(), int(line.split("|")[1])
+
+def test_deferred_imports():
+    '''Checks that rarely used modules are not loaded by import roulette.'''
+    modules, _ = import_roulette()
+    for name in HEAVY:
+        assert name not in modules, name
+        
+def test_import_budget():
+    _, cumulative = import_roulette()
+    assert cumulative < BUDGET_US
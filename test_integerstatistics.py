@@ -1,4 +1,4 @@
-from roulette import IntegerStatistics
+from roulette import IntegerStatistics, RunningStatistics
 
 def test_integerstatistics():
     '''Test that statistics are calculated correctly for a sample dataset.'''
@@ -7,4 +7,30 @@ def test_integerstatistics():
     assert sample.mean() == 9.0
     assert len(sample) == 11.0
     assert sum(sample) == 99
-    assert round(sample.stdev(),3) == 3.317
\ No newline at end of file
+    assert round(sample.stdev(),3) == 3.317
+
+def test_runningstatistics():
+    '''Test that streaming statistics match IntegerStatistics.'''
+    data = [10,8,13,9,11,14,6,4,12,7,5]
+    sample = RunningStatistics(data)
+    assert sample.mean() == 9.0
+    assert len(sample) == 11
+    assert round(sample.stdev(),3) == 3.317
+    assert (sample.minimum, sample.maximum) == (4, 14)
+    
+def test_merge():
+    '''Test that merged partial statistics match statistics of all the data.'''
+    data = [10,8,13,9,11,14,6,4,12,7,5]
+    whole = IntegerStatistics(data)
+    
+    sample = IntegerStatistics(data[:4])
+    sample.merge(IntegerStatistics(data[4:]))
+    assert sample == whole
+    
+    running = RunningStatistics()
+    for part in (data[:4], [], data[4:9], data[9:]):
+        running.merge(RunningStatistics(part))
+    assert len(running) == 11
+    assert running.mean() == 9.0
+    assert round(running.stdev(),9) == round(whole.stdev(),9)
+    assert (running.minimum, running.maximum) == (4, 14)
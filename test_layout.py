@@ -0,0 +1,81 @@
+import pickle
+from roulette import (Wheel, Outcome, Bet, Table, BinBuilder, EuroBinBuilder,
+                      LayoutBuilder, get_layout)
+
+class TestLayout:
+    '''Checks that cached layouts match freshly built bins and are not shared
+    mutably between Wheels.'''
+    def test_matches_builder(self):
+        for rules, builder in (("american", BinBuilder()), ("european", EuroBinBuilder())):
+            wheel = Wheel(rules=None)
+            builder.build_bins(wheel)
+            layout = get_layout(rules)
+            
+            assert list(layout.bins) == wheel.bins
+            assert [b.mask for b in layout.bins] == [b.mask for b in wheel.bins]
+            assert [o.name for o in layout.outcomes] == [o.name for o in wheel.outcomes]
+            assert layout.payouts == wheel.payout_matrix()
+            
+    def test_shared(self):
+        '''Wheels reference the cached bins instead of rebuilding them.'''
+        w1 = Wheel(1)
+        w2 = Wheel(2)
+        assert get_layout("american") is get_layout("american")
+        assert all(b1 is b2 for b1, b2 in zip(w1.bins, w2.bins))
+        assert w1.get_outcome("red") is w2.get_outcome("red")
+        
+    def test_copy_on_change(self):
+        '''Changing one Wheel leaves the layout and other Wheels alone.'''
+        w1 = Wheel()
+        w2 = Wheel()
+        test = Outcome("test", 35)
+        w1.add_outcome(4, test)
+        
+        assert test in w1.get(4)
+        assert test not in w2.get(4)
+        assert test not in get_layout("american").bins[4]
+        assert w2.get_outcome("test") is None
+        assert w1.payout_matrix()[4][test.id] == 35
+        
+    def test_mixed_rules(self):
+        '''American and European wheels in one process keep their own ids.'''
+        american = Wheel(1, "american")
+        euro = Wheel(1, "european")
+        five, zero = euro.get_outcome("5").id, american.get_outcome("0").id
+        
+        bet = Bet(1, euro.get_outcome("5"))
+        Table(100, american).place_bet(bet)
+        euro.add_bin(0, american.get(0))
+        euro.add_outcome(1, american.get_outcome("00"))
+        
+        assert get_layout("european").outcome_index["5"].id == five
+        assert get_layout("american").outcome_index["0"].id == zero
+        assert bet.outcome is american.get_outcome("5")
+        assert euro.get(0).mask >> euro.get_outcome("00").id & 1 == 0
+        assert euro.get(1).mask >> euro.get_outcome("00").id & 1
+        
+        table = Table(100, Wheel(2, "american"))
+        table.place_bet(Bet(1, Outcome("0", 35)))
+        assert table.settle([0, 37]) == [35, 0]
+        
+    def test_pickle(self):
+        layout = get_layout("european")
+        data = pickle.dumps(layout)
+        loaded = pickle.loads(data)
+        
+        assert len(data) < 10000
+        assert loaded.bins == layout.bins
+        assert [b.mask for b in loaded.bins] == [b.mask for b in layout.bins]
+        assert type(loaded.outcome_index["0"]) is type(layout.outcome_index["0"])
+        assert loaded.payouts == layout.payouts
+        
+    def test_builder_freeze(self):
+        builder = LayoutBuilder()
+        red = Outcome("red", 1)
+        builder.add_outcome(1, red)
+        builder.add_outcome(3, Outcome("red", 1))
+        layout = builder.freeze("test")
+        
+        assert layout.outcomes == (red,)
+        assert red in layout.bins[1] and red in layout.bins[3]
+        assert layout.bins[3].mask == 1
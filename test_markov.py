@@ -0,0 +1,43 @@
+from markov import MarkovSolver, solve
+from roulette import Wheel, Table, MartingaleEngine
+
+class TestMarkovSolver:
+    '''Checks exact distributions against hand-derived cases and sampling.'''
+    def setup_method(self):
+        self.solver = MarkovSolver(Wheel(), table_limit=100)
+        self.p_black = self.p_red = 18/38
+        
+    def test_probabilities(self):
+        assert self.solver.p_black == self.p_black
+        assert self.solver.p_red == self.p_red
+        
+    def test_martingale_single_chip(self):
+        '''With one chip the session lasts until the first loss.'''
+        self.solver.init_stake = 1
+        self.solver.init_duration = 5
+        durations, maxima = self.solver.solve("martingale")
+        
+        for k in range(1, 5):
+            assert round(durations[k], 12) == round(self.p_black**(k-1) * (1 - self.p_black), 12)
+        assert round(durations[5], 12) == round(self.p_black**4, 12)
+        assert round(maxima[1], 12) == 1
+        
+    def test_sevenreds_waits(self):
+        '''SevenReds can only lose its chip on a bet after seven reds.'''
+        self.solver.init_stake = 1
+        self.solver.init_duration = 9
+        durations, _ = self.solver.solve("sevenreds")
+        
+        assert round(durations[8], 12) == round(self.p_red**7 * (1 - self.p_black), 12)
+        assert round(durations[8] + durations[9], 12) == 1
+        
+    def test_matches_sampling(self):
+        durations, maxima = solve("martingale", table_limit=100)
+        assert round(sum(durations.values()), 9) == 1
+        
+        engine = MartingaleEngine(Table(100, Wheel(1)))
+        engine.samples = 5000
+        engine.gather()
+        assert abs(durations.mean() - engine.durations.mean()) < 3 * durations.stdev() / 5000**.5
+        assert abs(durations.stdev() - engine.durations.stdev()) < 1
+        assert round(maxima.mean(), 9) == engine.maxima.mean()
@@ -0,0 +1,73 @@
+from roulette import MartingaleEngine, Simulator, Martingale, Game, Wheel, Table, Bin
+
+class TestMartingaleEngine:
+    '''Checks that the lockstep engine reproduces Simulator's statistics.'''
+    def setup_method(self):
+        self.wheel = Wheel(1)
+        self.table = Table(100, self.wheel)
+    
+    def paint(self, name):
+        '''Turns every bin into a bin containing only the named Outcome.'''
+        outcome = self.wheel.get_outcome(name)
+        for i in range(38):
+            self.wheel.add_bin(i, Bin([outcome]))
+    
+    def simulate(self):
+        simulator = Simulator(Game(self.table), Martingale(self.table))
+        simulator.samples = 5
+        simulator.gather()
+        return simulator
+        
+    def test_gather(self):
+        engine = MartingaleEngine(self.table)
+        engine.gather()
+        
+        assert len(engine.durations) == engine.samples
+        assert len(engine.maxima) == engine.samples
+        
+    def test_always_losing(self):
+        '''Losing every spin, the stake runs out after 1+2+4+...+32 and 37.'''
+        self.paint("red")
+        engine = MartingaleEngine(self.table)
+        engine.samples = 5
+        engine.gather()
+        
+        simulator = self.simulate()
+        assert engine.durations == simulator.durations == [7]*5
+        assert engine.maxima == simulator.maxima
+        
+    def test_always_winning(self):
+        self.paint("black")
+        engine = MartingaleEngine(self.table)
+        engine.samples = 5
+        engine.gather()
+        
+        simulator = self.simulate()
+        assert engine.durations == simulator.durations == [250]*5
+        assert engine.maxima == simulator.maxima
+        
+    def test_flat(self):
+        '''Flat bets of 10 on a losing wheel last 10 rounds.'''
+        self.paint("red")
+        engine = MartingaleEngine(self.table, flat=True)
+        engine.base = 10
+        engine.gather()
+        
+        assert engine.durations == [10]*engine.samples
+        
+    def test_seeded(self):
+        '''Checks that seeded runs are reproducible and match Simulator.'''
+        engine = MartingaleEngine(self.table)
+        engine.samples = 1000
+        engine.gather()
+        
+        other = MartingaleEngine(Table(100, Wheel(1)))
+        other.samples = 1000
+        other.gather()
+        assert engine.durations == other.durations
+        
+        table = Table(100, Wheel(2))
+        simulator = Simulator(Game(table), Martingale(table))
+        simulator.samples = 1000
+        simulator.gather()
+        assert abs(engine.durations.mean() - simulator.durations.mean()) < 5
@@ -21,5 +21,11 @@ class TestOutcome(unittest.TestCase):
         o2 = Outcome("Any Craps", 8)
         self.assertEqual(hash(o1), hash(o2), "Hashes not equal.")
         
+    def test_slots(self):
+        '''Check that Outcomes do not carry a per-instance dict'''
+        o1 = Outcome("Any Craps", 8)
+        with self.assertRaises(AttributeError):
+            o1.payout = 9
+        
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -91,8 +91,24 @@ class TestPlayer:
         simulator.player.set_rounds(simulator.init_duration)
         simulator.player.set_stake(simulator.init_stake)
         
-        all_outcomes = simulator.game.table.wheel.get_all_outcomes()
+        outcomes = simulator.game.table.wheel.get_outcome_tuple()
         
         r = random.Random(1)
-        for _ in range(5):
-            assert r.sample(all_outcomes, 1)[0] == simulator.player.place_bets().outcome
\ No newline at end of file
+        block = simulator.player.BLOCK
+        expected = r.choices(outcomes, k=block) + r.choices(outcomes, k=block)
+        for outcome in expected:
+            assert outcome == simulator.player.place_bets().outcome
+            simulator.game.table.clear_bets()
+        
+    def test_reset(self):
+        '''Checks that reset clears the betting state and keeps the rng.'''
+        player = self.sb.get_simulator("sevenreds").player
+        player.red_count, player.multiplier, player.stake = 5, 3, 40
+        player.reset()
+        assert (player.red_count, player.multiplier, player.stake) == (0, 0, None)
+        assert player.black == Wheel(1).get_outcome("black")
+        
+        player = self.sb.get_simulator("random").player
+        rng = player.rng
+        player.reset()
+        assert player.rng is rng
@@ -0,0 +1,27 @@
+import profiling
+
+def inner():
+    return sum(range(1000))
+
+def outer():
+    total = 0
+    for _ in range(10):
+        total += inner()
+    return total
+
+def test_collapsed(tmp_path):
+    '''Checks that collapsed stacks nest callers before callees.'''
+    path = tmp_path / "stacks.txt"
+    assert profiling.collapsed(outer, path) == outer()
+    
+    stacks = [line.rsplit(" ", 1)[0] for line in path.read_text().splitlines()]
+    assert "test_profiling.py:outer;test_profiling.py:inner" in stacks
+    assert "test_profiling.py:outer;test_profiling.py:inner;sum" in stacks
+
+def test_cprofile(tmp_path):
+    import pstats
+    
+    path = tmp_path / "run.prof"
+    profiling.cprofile(outer, str(path))
+    functions = [name for _, _, name in pstats.Stats(str(path)).stats]
+    assert "inner" in functions
@@ -0,0 +1,82 @@
+import random
+import pytest
+from roulette import Wheel, SimulationBuilder, derive_seeds
+from rng import MersenneRNG, make_rng
+
+class TestMersenneRNG:
+    '''Checks that the default backend draws exactly what random.Random does.'''
+    def test_randbelow(self):
+        rng, reference = MersenneRNG(1), random.Random(1)
+        assert [rng.randbelow(38) for _ in range(100)] == \
+            [reference.randint(0, 37) for _ in range(100)]
+        assert rng.getstate() == reference.getstate()
+        
+    def test_randbelow_batch(self):
+        rng, reference = MersenneRNG(2), MersenneRNG(2)
+        assert list(rng.randbelow_batch(38, 200)) == [reference.randbelow(38) for _ in range(200)]
+        assert rng.getstate() == reference.getstate()
+        
+    def test_wheel(self):
+        '''Checks that Wheel and PlayerRandom default to the same stream as before'''
+        reference = random.Random(5)
+        wheel = Wheel(5)
+        assert [wheel.next() for _ in range(50)] == \
+            [wheel.bins[reference.randint(0, 37)] for _ in range(50)]
+        
+    def test_spawn_seeds(self):
+        assert MersenneRNG.spawn_seeds(7, 4) == derive_seeds(7, 4)
+        children = MersenneRNG(7).spawn(2)
+        assert children[0].random() != children[1].random()
+        
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            make_rng("lcg", 1)
+            
+    def test_player_random_keeps_rng(self):
+        '''Checks that resetting PlayerRandom between sessions keeps its stream'''
+        simulator = SimulationBuilder(table_limit=1000, seed=3).get_simulator("random")
+        rng = simulator.player.rng
+        simulator.init_duration = 5
+        simulator.session()
+        assert simulator.player.rng is rng
+
+class TestPCG64RNG:
+    '''Checks the NumPy backend, when NumPy is installed.'''
+    def setup_method(self):
+        pytest.importorskip("numpy")
+        
+    def test_split_draws(self):
+        '''Checks that single and batched draws share one stream'''
+        rng, reference = make_rng("pcg64", 1), make_rng("pcg64", 1)
+        draws = [rng.randbelow(38) for _ in range(10)] + list(rng.randbelow_batch(38, 5000))
+        assert draws == list(reference.randbelow_batch(38, 5010))
+        assert all(0 <= d < 38 for d in draws)
+        
+    def test_checkpoint(self):
+        wheel = Wheel(rng=make_rng("pcg64", 2))
+        checkpoint = wheel.checkpoint()
+        spins = wheel.spin_batch(100)
+        wheel.rewind(checkpoint, 40)
+        assert list(wheel.spin_batch(60)) == list(spins[40:])
+        
+    def test_spawn(self):
+        children = make_rng("pcg64", 3).spawn(2)
+        assert list(children[0].randbelow_batch(38, 20)) != list(children[1].randbelow_batch(38, 20))
+        
+    def test_player_substream(self):
+        '''Checks that the wheel and PlayerRandom do not draw the same sequence'''
+        simulator = SimulationBuilder(100, seed=5, backend="pcg64").get_simulator("random")
+        wheel_draws = simulator.game.table.wheel.rng.randbelow_batch(38, 50)
+        player_draws = simulator.player.rng.randbelow_batch(38, 50)
+        assert list(wheel_draws) != list(player_draws)
+        
+    def test_simulation(self):
+        '''Checks that seeded simulations repeat, in process and on workers'''
+        results = []
+        for workers in (1, 1, 2, 2):
+            simulator = SimulationBuilder(100, seed=4, backend="pcg64").get_simulator("sevenreds")
+            simulator.samples = 20
+            simulator.gather(workers=workers)
+            results.append(list(simulator.durations))
+        assert results[0] == results[1]
+        assert results[2] == results[3]
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from roulette import Wheel
+from server import GameServer, LiveWheel, HIGH_WATER, push
+
+async def exchange(server, messages, spins=1):
+    '''Sends messages to the server, then collects replies until spins spin
+    events have arrived.'''
+    host, port = await server.start()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for message in messages:
+            writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        replies = []
+        while sum(r["event"] == "spin" for r in replies) < spins:
+            replies.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        return replies
+    finally:
+        writer.close()
+        await server.stop()
+
+def test_bets_settled():
+    '''Checks that queued bets are validated and settled at the next spin.'''
+    server = GameServer(tables=50, limit=100, interval=0.01, seed=1)
+    replies = asyncio.run(exchange(server, [
+        {"op": "bet", "table": 7, "outcome": "black", "amount": 60},
+        {"op": "bet", "table": 7, "outcome": "17", "amount": 30},
+        {"op": "bet", "table": 7, "outcome": "red", "amount": 20},
+        {"op": "bet", "table": 7, "outcome": "gibberish", "amount": 5},
+    ]))
+    
+    acks = [r for r in replies if r["event"] == "bet"]
+    assert [r["id"] for r in acks] == [1, 2, 3]
+    assert [r["event"] for r in replies].count("error") == 1
+    
+    spin = [r for r in replies if r["event"] == "spin"][0]
+    assert spin["table"] == 7
+    assert spin["rejected"] == [3]
+    winning = server.tables[7].wheel.get(spin["bin"])
+    for result, (outcome, amount) in zip(spin["bets"], [("black", 60), ("17", 30)]):
+        won = server.tables[7].wheel.get_outcome(outcome) in winning
+        assert result["won"] == won
+        assert result["payout"] == (amount * server.tables[7].wheel.get_outcome(outcome).odds if won else 0)
+        
+def test_bad_requests():
+    '''Checks that boolean amounts and overlong lines get an error reply.'''
+    server = GameServer(tables=1, interval=60)
+    
+    async def run():
+        host, port = await server.start()
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(b'{"op": "bet", "table": 0, "outcome": "red", "amount": true}\n')
+            writer.write(b"x" * (1 << 17) + b"\n")
+            writer.write(b'{"op": "tables"}\n')
+            await writer.drain()
+            return [json.loads(await asyncio.wait_for(reader.readline(), 5))
+                    for _ in range(3)]
+        finally:
+            writer.close()
+            await server.stop()
+    replies = asyncio.run(run())
+    assert [r["event"] for r in replies] == ["error", "error", "tables"]
+    assert replies[1]["error"] == "line too long"
+    
+def test_stop_closes_clients():
+    '''Checks that stopping the server disconnects clients still connected.'''
+    server = GameServer(tables=1, interval=60)
+    
+    async def run():
+        host, port = await server.start()
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b'{"op": "tables"}\n')
+        await reader.readline()
+        await server.stop()
+        assert server.clients == {}
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        writer.close()
+    asyncio.run(run())
+    
+def test_tables():
+    '''Checks that all tables keep spinning without clients.'''
+    server = GameServer(tables=1000, interval=0.01)
+    
+    async def run():
+        await server.start()
+        await asyncio.sleep(0.1)
+        await server.stop()
+    asyncio.run(run())
+    assert all(t.spins > 0 for t in server.tables)
+
+def test_live_wheel():
+    '''Checks that LiveWheel spins like Wheel and records the bin index.'''
+    live, wheel = LiveWheel(4), Wheel(4)
+    for _ in range(50):
+        assert live.next() is live.bins[live.last]
+        assert live.bins[live.last] == wheel.next()
+
+class SlowWriter:
+    '''Stands in for the StreamWriter of a client that stopped reading.'''
+    def __init__(self, buffered):
+        self.transport = self
+        self.buffered = buffered
+        self.written = []
+        self.closed = False
+        
+    def get_write_buffer_size(self):
+        return self.buffered
+    
+    def is_closing(self):
+        return self.closed
+    
+    def write(self, data):
+        self.written.append(data)
+        
+    def close(self):
+        self.closed = True
+
+def test_push_high_water():
+    '''Checks that clients too far behind are dropped instead of buffered.'''
+    writer = SlowWriter(HIGH_WATER)
+    push(writer, {"event": "spin"})
+    assert writer.written == [b'{"event": "spin"}\n'] and not writer.closed
+    
+    writer.buffered += 1
+    push(writer, {"event": "spin"})
+    assert len(writer.written) == 1 and writer.closed
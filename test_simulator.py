@@ -1,4 +1,4 @@
-from roulette import Simulator, Martingale, Game, Wheel, Table
+from roulette import Simulator, Martingale, Game, Wheel, Table, SimulationBuilder
 
 class TestSimulator():
     '''Checks that Simulator's results match a seeded simulation results.'''
@@ -39,8 +39,101 @@ class TestSimulator():
         assert type(stakes) == list
         assert stakes == simulated_stakes
         
+    def test_simulator_session_history(self):
+        '''Checks the typed array history and the summary of a lean session.'''
+        stakes = self.simulator.session(history="array")
+        assert stakes.typecode == 'l'
+        
+        self.setup_method()
+        assert self.simulator.session() == stakes.tolist()
+        
+        self.setup_method()
+        duration, maximum, final, drawdown = self.simulator.session(history=False)
+        assert duration == len(stakes) - 1
+        assert maximum == max(stakes) == self.simulator.maxima[0]
+        assert final == stakes[-1]
+        assert drawdown == max(max(stakes[:i+1]) - x for i, x in enumerate(stakes))
+        
     def test_simulator_gather(self):
         self.simulator.gather()
         
         assert len(self.simulator.durations) == self.simulator.samples
-        assert len(self.simulator.maxima) == self.simulator.samples
\ No newline at end of file
+        assert len(self.simulator.maxima) == self.simulator.samples
+        
+    def test_simulator_gather_parallel(self):
+        '''Checks that parallel gathers are reproducible from the builder seed.'''
+        def gather(seed, workers):
+            simulator = SimulationBuilder(table_limit=100, seed=seed).get_simulator("martingale")
+            simulator.samples = 21
+            simulator.gather(workers=workers)
+            return simulator
+        
+        simulator = gather(1, 2)
+        assert len(simulator.durations) == simulator.samples
+        assert len(simulator.maxima) == simulator.samples
+        
+        other = gather(1, 2)
+        assert simulator.durations == other.durations
+        assert simulator.maxima == other.maxima
+        assert simulator.durations != gather(2, 2).durations
+        
+    def test_simulator_running_statistics(self):
+        '''Checks that the simulator can gather without storing every value.'''
+        sb = SimulationBuilder(table_limit=100, seed=1)
+        simulator = sb.get_simulator("martingale", keep_values=False)
+        simulator.gather(workers=2)
+        
+        expected = SimulationBuilder(table_limit=100, seed=1).get_simulator("martingale")
+        expected.gather(workers=2)
+        assert len(simulator.durations) == simulator.samples
+        assert round(simulator.durations.mean(),9) == round(expected.durations.mean(),9)
+        assert round(simulator.durations.stdev(),9) == round(expected.durations.stdev(),9)
+        
+    def test_simulator_gather_until(self):
+        '''Checks that adaptive gathering stops once the interval is narrow enough.'''
+        estimates = self.simulator.gather_until(width=10, batch=20)
+        mean, half = estimates["durations"]
+        
+        assert estimates["samples"] == len(self.simulator.durations)
+        assert estimates["samples"] % 20 == 0
+        assert half * 2 <= 10
+        assert mean == self.simulator.durations.mean()
+        assert estimates["maxima"] == (100, 0)
+        
+    def test_simulator_gather_until_running(self):
+        '''Checks that the running estimates include earlier sessions and
+        agree with the estimates from the stored values.'''
+        self.simulator.samples = 30
+        self.simulator.gather()
+        estimates = self.simulator.gather_until(width=0, batch=20, max_samples=90)
+        stored = self.simulator.estimates()
+        
+        assert estimates["samples"] == stored["samples"] == 90
+        for name in ("durations", "maxima"):
+            assert estimates[name][0] == stored[name][0]
+            assert abs(estimates[name][1] - stored[name][1]) < 1e-9
+        
+    def test_simulator_gather_max_samples(self):
+        self.simulator.gather_until(width=0, batch=20, max_samples=40)
+        assert len(self.simulator.durations) == 40
+        
+    def test_simulator_gather_budget(self):
+        '''Checks that adaptive gathering stops when time runs out.'''
+        estimates = self.simulator.gather_until(width=0, budget=0, batch=5)
+        assert estimates["samples"] == 5
+        assert self.simulator.estimates()["samples"] == 5
+        
+    def test_simulator_sevenreds_fast(self):
+        '''Checks that SevenReds.play gives the same sessions as Game.cycle'''
+        results = []
+        for fast in (True, False):
+            simulator = SimulationBuilder(table_limit=50, seed=3).get_simulator("sevenreds")
+            simulator.fast = fast
+            simulator.init_stake = 40
+            simulator.init_duration = 1000
+            sessions = [simulator.session(history=False) for _ in range(30)]
+            player = simulator.player
+            results.append((sessions, player.multiplier, player.red_count,
+                            simulator.game.table.wheel.next()))
+        assert results[0] == results[1]
+        assert any(session[0] < 1000 for session in results[0][0])
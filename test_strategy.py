@@ -0,0 +1,80 @@
+import pytest
+from roulette import SimulationBuilder, MartingaleEngine, Table, Wheel
+from strategy import Strategy, STRATEGIES, SpecPlayer, SpecEngine, simulator
+
+class TestStrategy:
+    '''Checks that compiled strategies play like the Players they describe.'''
+    def sessions(self, sim, n=30):
+        sim.init_stake = 60
+        sim.init_duration = 400
+        return [sim.session(history=False) for _ in range(n)]
+    
+    @pytest.mark.parametrize("mode", ["martingale", "sevenreds"])
+    def test_spec_player(self, mode):
+        '''Checks that SpecPlayer matches the hand written Player exactly'''
+        reference = SimulationBuilder(table_limit=50, seed=2).get_simulator(mode)
+        reference.fast = False
+        spec = simulator(STRATEGIES[mode], table_limit=50, seed=2)
+        assert self.sessions(spec) == self.sessions(reference)
+        
+    def test_spec_engine(self):
+        '''Checks that the kernel matches MartingaleEngine for the martingale spec'''
+        engine = MartingaleEngine(Table(50, Wheel(3)))
+        spec = SpecEngine(Table(50, Wheel(3)), STRATEGIES["martingale"])
+        for e in (engine, spec):
+            e.samples = 200
+            e.gather()
+        assert spec.durations == engine.durations
+        assert spec.maxima == engine.maxima
+        
+    @pytest.mark.parametrize("name", sorted(STRATEGIES))
+    def test_engine_statistics(self, name):
+        '''Checks that the kernel and SpecPlayer agree on the mean duration'''
+        strategy = STRATEGIES[name]
+        engine = SpecEngine(Table(100, Wheel(4)), strategy)
+        engine.samples = 2000
+        engine.init_duration = 100
+        engine.gather()
+        sim = simulator(strategy, table_limit=100, seed=5)
+        sim.samples = 2000
+        sim.init_duration = 100
+        sim.gather()
+        assert abs(engine.durations.mean() - sim.durations.mean()) < 5
+        
+    def test_stop_rules(self):
+        '''Checks that sessions stop at the target with odds paid'''
+        strategy = Strategy(on_loss="same", base=10, target=130, pay_odds=True)
+        sim = simulator(strategy, table_limit=100, seed=6)
+        sim.samples = 50
+        sim.gather()
+        assert max(sim.maxima) <= 130
+        assert any(m == 130 for m in sim.maxima)
+        engine = SpecEngine(Table(100, Wheel(6)), strategy)
+        engine.gather()
+        assert max(engine.maxima) <= 130
+        
+    def test_trigger_streak(self):
+        '''Checks that no bet is placed before the trigger streak'''
+        player = SpecPlayer(Table(100, Wheel(1)), STRATEGIES["sevenreds"])
+        player.set_stake(100)
+        player.set_rounds(10)
+        player.place_bets()
+        assert len(player.table) == 0
+        player.streak = 7
+        player.place_bets()
+        assert len(player.table) == 1
+        
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            Strategy(on_loss="triple")
+        with pytest.raises(ValueError):
+            SpecPlayer(Table(100, Wheel()), Strategy(outcome="purple"))
+        with pytest.raises(TypeError):
+            SpecPlayer(Table(100, Wheel()))
+            
+    def test_reset(self):
+        '''Checks that reset starts the next session from the first bet'''
+        player = SpecPlayer(Table(100, Wheel(1)), STRATEGIES["dalembert"])
+        player.bet, player.streak = 9, 3
+        player.reset()
+        assert (player.bet, player.streak, player.stake) == (1, 0, None)
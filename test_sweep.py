@@ -0,0 +1,64 @@
+import csv
+from roulette import SimulationBuilder
+import sweep
+
+class TestSweep:
+    '''Checks the sweep grid and that cells match a direct simulation.'''
+    def setup_method(self):
+        self.cells = sweep.cells(["martingale", "sevenreds"], [100, 1000], [50],
+                                 [100], [10], seed=3)
+        
+    def test_cells(self):
+        assert len(self.cells) == 4
+        assert [cell[:5] for cell in self.cells] == [
+            ("martingale", 100, 50, 100, 10), ("martingale", 1000, 50, 100, 10),
+            ("sevenreds", 100, 50, 100, 10), ("sevenreds", 1000, 50, 100, 10)]
+        assert self.cells == sweep.cells(["martingale", "sevenreds"], [100, 1000],
+                                         [50], [100], [10], seed=3)
+        
+    def test_cell_seeds(self):
+        '''Cells keep their seeds when the grids around them change.'''
+        wider = sweep.cells(["martingale", "sevenreds"], [10, 100, 1000], [50],
+                            [100], [10], seed=3)
+        assert set(self.cells) <= set(wider)
+        assert len({cell[-1] for cell in wider}) == len(wider)
+        assert self.cells != sweep.cells(["martingale", "sevenreds"], [100, 1000],
+                                         [50], [100], [10], seed=4)
+        
+    def test_run_cell(self):
+        cell = self.cells[0]
+        simulator = SimulationBuilder(100, cell[-1]).get_simulator("martingale")
+        simulator.init_stake = 50
+        simulator.init_duration = 100
+        simulator.samples = 10
+        simulator.gather()
+        result = sweep.run_cell(cell)
+        assert result[:6] == cell
+        assert result[6] == simulator.durations.mean()
+        assert result[8] == simulator.maxima.mean()
+        assert result[10] == max(simulator.maxima)
+        
+    def test_invalid_cell(self):
+        '''Checks that a cell the table refuses gets an error row.'''
+        cells = sweep.cells(["random"], [100], [50, 500], [100], [5], seed=1)
+        results = sweep.run(cells, workers=2)
+        assert results[0][-1] is None and results[0][6] is not None
+        assert results[1][:6] == cells[1]
+        assert results[1][6:-1] == (None,) * 5 and results[1][-1]
+        
+    def test_parallel(self):
+        progress = []
+        serial = sweep.run(self.cells)
+        parallel = sweep.run(self.cells, workers=2,
+                             progress=lambda done, total: progress.append((done, total)))
+        assert parallel == serial
+        assert progress[-1] == (4, 4)
+        
+    def test_main(self, tmp_path):
+        path = tmp_path / "sweep.csv"
+        sweep.main(["--modes", "sevenreds", "--stakes", "50", "100", "--samples", "5",
+                    "--seed", "1", "--quiet", "--output", str(path)])
+        with open(path) as f:
+            rows = list(csv.reader(f))
+        assert tuple(rows[0]) == sweep.COLUMNS
+        assert [row[2] for row in rows[1:]] == ["50", "100"]
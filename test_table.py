@@ -1,5 +1,5 @@
 import pytest
-from roulette import Table, Bet, Outcome, Wheel
+from roulette import Table, ArrayTable, Bet, Outcome, Wheel, Simulator, Martingale, Game
 from exceptions import InvalidBet
 
 class TestTable:
@@ -34,5 +34,69 @@ class TestTable:
         
         self.table.clear_bets()
         assert len(self.table.bets) == 0
+        assert self.table.total == 0
         
-    
\ No newline at end of file
+    def test_total(self):
+        '''Checks that the running total follows the placed bets.'''
+        for amount in (10, 20, 30):
+            self.table.place_bet(Bet(amount, Outcome("0",35)))
+        assert self.table.total == 60
+        assert self.table.is_valid()
+    
+    def test_unknown_outcome(self):
+        '''Checks that Outcomes not on the wheel cannot be bet on'''
+        with pytest.raises(InvalidBet):
+            self.table.place_bet(Bet(10, Outcome("gibberish", 35)))
+        assert len(self.table.bets) == 0
+    
+    def test_settle(self):
+        '''Checks that settling the bet vector matches settling bet by bet'''
+        wheel = self.table.wheel
+        bets = [Bet(10, wheel.get_outcome("black")), Bet(5, wheel.get_outcome("17")),
+                Bet(20, wheel.get_outcome("dozen(2)"))]
+        for bet in bets:
+            self.table.place_bet(bet)
+        
+        spins = wheel.spin_batch(50)
+        expected = [sum(b.win_amount() for b in bets if b.outcome in wheel.get(i))
+                    for i in spins]
+        assert self.table.settle(spins) == expected
+        
+class TestArrayTable(TestTable):
+    '''Runs the Table tests against the typed array backend.'''
+    def setup_method(self, method):
+        wheel = Wheel()
+        self.table = ArrayTable(100, wheel)
+        
+    def test_add_bet(self):
+        '''Checks that bets come back as equivalent Bet views.'''
+        bet = Bet(60, Outcome("0",35))
+        self.table.place_bet(bet)
+        view = next(iter(self.table))
+        assert view.amount == bet.amount
+        assert view.outcome is self.table.wheel.get_outcome("0")
+        
+    def test_invalid_bet(self):
+        '''Checks that rejected bets are not kept on the table.'''
+        self.table.place_bet(Bet(60, Outcome("0",35)))
+        with pytest.raises(InvalidBet):
+            self.table.place_bet(Bet(50, Outcome("0",35)))
+        assert len(self.table) == 1
+        assert self.table.total == 60
+        
+    def test_fractional_amount(self):
+        '''Checks that a refused amount leaves the columns in step.'''
+        wheel = self.table.wheel
+        with pytest.raises(TypeError):
+            self.table.place_bet(Bet(1.5, wheel.get_outcome("red")))
+        self.table.place_bet(Bet(2, wheel.get_outcome("black")))
+        assert [(b.amount, b.outcome) for b in self.table] == [(2, wheel.get_outcome("black"))]
+        assert self.table.total == 2
+        
+    def test_simulator_session(self):
+        '''Checks that a session plays the same on either Table.'''
+        def session(table):
+            simulator = Simulator(Game(table), Martingale(table))
+            return simulator.session()
+        
+        assert session(ArrayTable(100, Wheel(1))) == session(Table(100, Wheel(1)))
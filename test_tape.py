@@ -0,0 +1,91 @@
+import pytest
+from exceptions import TapeExhausted
+from roulette import Wheel, SimulationBuilder, Table, Game, SevenReds
+from tape import record, SpinTape, TapeWheel
+
+class TestTape:
+    '''Checks that replayed tapes give the spins of the recording wheel.'''
+    @pytest.fixture(autouse=True)
+    def recorded(self, tmp_path):
+        self.path = tmp_path / "spins.tape"
+        record(Wheel(1), 5000, self.path, chunk=1000)
+        self.tape = SpinTape(self.path)
+        yield
+        self.tape.close()
+        
+    def test_record(self):
+        assert len(self.tape) == 5000
+        assert self.path.stat().st_size == 16 + 5000
+        assert list(self.tape.spins[:100]) == list(Wheel(1).spin_batch(100))
+        
+    def test_replay(self):
+        live = Wheel(1)
+        wheel = TapeWheel(self.tape)
+        for _ in range(50):
+            assert wheel.next() == live.next()
+        assert list(wheel.spin_batch(50)) == list(live.spin_batch(50))
+        assert TapeWheel(self.tape, start=50).next() == Wheel(1).bins_for(Wheel(1).spin_batch(51))[50]
+        
+    def test_simulator_replay(self):
+        '''Checks that a simulation replayed from tape matches the live one.'''
+        live = SimulationBuilder(table_limit=100, seed=1).get_simulator("martingale")
+        live.samples = 20
+        live.gather()
+        
+        replay = SimulationBuilder(table_limit=100, wheel=TapeWheel(self.tape)).get_simulator("martingale")
+        replay.samples = 20
+        replay.gather()
+        assert replay.durations == live.durations
+        
+    def test_parallel_refused(self):
+        '''A parallel gather cannot replay the tape, so it refuses to run.'''
+        replay = SimulationBuilder(table_limit=100, seed=1,
+                                   wheel=TapeWheel(self.tape)).get_simulator("martingale")
+        assert replay.mode is None
+        with pytest.raises(ValueError):
+            replay.gather(workers=2)
+        
+    def test_rewind(self):
+        '''Checks that rewinding moves along the tape, not an unused rng'''
+        wheel = TapeWheel(self.tape)
+        checkpoint = wheel.checkpoint()
+        spins = list(wheel.spin_batch(20))
+        wheel.rewind(checkpoint, 5)
+        assert wheel.position == 5
+        assert list(wheel.spin_batch(15)) == spins[5:]
+        
+    def test_sevenreds_play(self):
+        '''Checks that SevenReds.play replays a tape like Game.cycle does'''
+        results = []
+        for fast in (True, False):
+            table = Table(100, TapeWheel(self.tape))
+            player = SevenReds(table)
+            # A small stake runs out part way through a batch, so play rewinds.
+            player.set_stake(10)
+            player.set_rounds(3000)
+            if fast:
+                player.play()
+            else:
+                game = Game(table)
+                while player.playing():
+                    game.cycle(player)
+            results.append((player.stake, player.rounds, table.wheel.position))
+        assert results[0] == results[1]
+        assert results[0][0] == 0 and results[0][1] > 0
+        
+    def test_exhausted(self):
+        wheel = TapeWheel(self.tape, start=4999)
+        wheel.next()
+        with pytest.raises(TapeExhausted):
+            wheel.next()
+        with pytest.raises(TapeExhausted):
+            wheel.spin_batch(1)
+            
+    def test_not_a_tape(self, tmp_path):
+        path = tmp_path / "other"
+        path.write_bytes(b"not a tape at all")
+        with pytest.raises(ValueError):
+            SpinTape(path)
+        path.write_bytes(b"SPIN")
+        with pytest.raises(ValueError):
+            SpinTape(path)
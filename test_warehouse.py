@@ -0,0 +1,53 @@
+import sqlite3
+from contextlib import closing
+import pytest
+from roulette import SimulationBuilder
+from warehouse import Warehouse, summary
+
+class TestWarehouse:
+    '''Checks that simulator sessions are streamed to the database.'''
+    @pytest.fixture(autouse=True)
+    def database(self, tmp_path):
+        self.path = str(tmp_path / "results.db")
+        
+    def rows(self):
+        with closing(sqlite3.connect(self.path)) as connection:
+            return connection.execute(
+                "SELECT strategy, seed, table_limit, stake, duration, maximum,"
+                " final_stake FROM sessions ORDER BY id").fetchall()
+    
+    def test_sink(self):
+        simulator = SimulationBuilder(table_limit=100, seed=1).get_simulator("martingale")
+        simulator.samples = 25
+        with Warehouse(self.path, batch=10) as simulator.sink:
+            simulator.gather()
+        rows = self.rows()
+        assert len(rows) == 25
+        assert [row[4] for row in rows] == list(simulator.durations)
+        assert [row[5] for row in rows] == list(simulator.maxima)
+        assert {row[:4] for row in rows} == {("martingale", 1, 100, 100)}
+        
+    def test_wal_and_indexes(self):
+        Warehouse(self.path).close()
+        with closing(sqlite3.connect(self.path)) as connection:
+            assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = {row[1] for row in connection.execute("PRAGMA index_list(sessions)")}
+        assert {"sessions_config", "sessions_seed"} <= indexes
+    
+    def test_summary(self):
+        with Warehouse(self.path) as sink:
+            sink.add(("sevenreds", 2, 100, 50, 10, 60, 0))
+            sink.add(("sevenreds", 3, 100, 50, 30, 80, 40))
+            sink.add(("martingale", 2, 100, 50, 20, 50, 10))
+        assert summary(self.path) == [("martingale", 100, 50, 1, 20.0, 50.0, 10.0),
+                                      ("sevenreds", 100, 50, 2, 20.0, 70.0, 20.0)]
+        
+    def test_parallel(self):
+        simulator = SimulationBuilder(table_limit=100, seed=5).get_simulator("martingale")
+        simulator.samples = 30
+        with Warehouse(self.path) as simulator.sink:
+            simulator.gather(workers=2)
+        rows = self.rows()
+        assert len(rows) == 30
+        assert {row[1] for row in rows} == {5}
+        assert sorted(row[4] for row in rows) == sorted(simulator.durations)
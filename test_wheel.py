@@ -55,4 +55,71 @@ class TestWheel:
             assert isinstance(bin_iter, Bin) == True
             assert self.wheel.get_outcome("{}".format(i)) in bin_iter.get_outcome_iterator()
         
-        assert self.wheel.get_outcome("00") in next(iterator)
\ No newline at end of file
+        assert self.wheel.get_outcome("00") in next(iterator)
+        
+    def test_spin_batch(self):
+        '''Checks that batched spins follow the same stream as next()'''
+        simulation = Wheel(1)
+        spins = self.wheel.spin_batch(100)
+        
+        assert len(spins) == 100
+        assert all(0 <= i < 38 for i in spins)
+        for b in self.wheel.bins_for(spins):
+            assert b == simulation.next()
+        assert self.wheel.next() == simulation.next()
+        
+    def test_outcome_ids(self):
+        '''Checks that Outcome ids are dense and match the Bin masks'''
+        assert [o.id for o in self.wheel.outcomes] == list(range(len(self.wheel.outcomes)))
+        for b in self.wheel.bins:
+            for o in self.wheel.outcomes:
+                assert (o in b) == bool(b.mask >> o.id & 1)
+    
+    def test_add_bin_mask(self):
+        o1 = Outcome("0", 35)
+        b1 = Bin([o1, Outcome("test", 35)])
+        self.wheel.add_bin(10, b1)
+        
+        assert o1.id is None and b1.mask == 0
+        assert self.wheel.get(10).mask == \
+            1 << self.wheel.get_outcome("0").id | 1 << self.wheel.get_outcome("test").id
+    
+    def test_get_outcomes(self):
+        red, black, missing = self.wheel.get_outcomes(["red", "black", "gibberish"])
+        
+        assert red == Outcome("red", 1)
+        assert black == Outcome("black", 1)
+        assert missing is None
+    
+    def test_payout_matrix(self):
+        '''Checks that each bin pays the odds of exactly its own Outcomes'''
+        payouts = self.wheel.payout_matrix()
+        assert len(payouts) == 38
+        for b, row in zip(self.wheel.bins, payouts):
+            for o in self.wheel.outcomes:
+                assert row[o.id] == (o.odds if o in b else 0)
+    
+    def test_lazy_layout(self):
+        '''Checks that the layout is only loaded once the bins are used'''
+        wheel = Wheel(1)
+        assert "bins" not in vars(wheel)
+        assert wheel.next() == self.wheel.next()
+        assert "bins" in vars(wheel)
+    
+    def test_rewind(self):
+        '''Checks that rewinding gives back the spins that were not used'''
+        checkpoint = self.wheel.checkpoint()
+        spins = self.wheel.spin_batch(20)
+        self.wheel.rewind(checkpoint, 5)
+        assert list(self.wheel.spin_batch(15)) == list(spins[5:])
+    
+    def test_outcome_tuple(self):
+        '''Checks that the outcome tuple is indexed by id and follows new Outcomes'''
+        outcomes = self.wheel.get_outcome_tuple()
+        assert isinstance(outcomes, tuple)
+        assert all(o.id == i for i, o in enumerate(outcomes))
+        assert set(outcomes) == self.wheel.get_all_outcomes()
+        
+        self.wheel.add_outcome(0, Outcome("extra", 1))
+        assert self.wheel.get_outcome_tuple()[-1] == Outcome("extra", 1)
+        assert len(outcomes) == len(self.wheel.get_outcome_tuple()) - 1
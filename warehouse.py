@@ -0,0 +1,140 @@
+'''SQLite warehouse of per-session simulation results.
+
+A Warehouse is a Simulator sink: the simulator hands it one row per session,
+(strategy, seed, table limit, stake, duration, maximum, final stake). Rows
+are gathered into batches, and a writer thread inserts each batch with one
+executemany and commit, so the simulation loop only appends to a list. The
+database runs in WAL mode, so it can be queried while a run is writing, and
+several worker processes can write to one database. Million-session runs
+can then be queried afterwards without holding them in memory:
+
+    SELECT strategy, table_limit, avg(duration), max(maximum)
+    FROM sessions GROUP BY strategy, table_limit
+'''
+import queue
+import sqlite3
+import threading
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    seed INTEGER,
+    table_limit INTEGER NOT NULL,
+    stake INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    maximum INTEGER NOT NULL,
+    final_stake INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_config
+    ON sessions (strategy, table_limit, stake);
+CREATE INDEX IF NOT EXISTS sessions_seed ON sessions (seed);
+'''
+
+INSERT = '''INSERT INTO sessions
+    (strategy, seed, table_limit, stake, duration, maximum, final_stake)
+    VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+def connect(path, timeout=60.0):
+    '''Opens the database at path in WAL mode, creating the schema.'''
+    connection = sqlite3.connect(path, timeout=timeout)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+class Warehouse:
+    '''Streams session rows to a SQLite database from a writer thread.
+
+    Parameters:
+        path: database file.
+        batch: number of rows inserted per transaction.
+        backlog: number of full batches that may wait for the writer before
+            add blocks, which bounds memory use if the disk falls behind.
+
+    Functions:
+        add: queues one row, (strategy, seed, table limit, stake, duration,
+            maximum, final stake).
+        flush: hands the rows queued so far to the writer.
+        sync: flushes and waits until every row is written.
+        close: writes every queued row and stops the writer.
+    '''
+    def __init__(self, path, batch=10000, backlog=8):
+        self.path = path
+        self.batch = batch
+        self.rows = []
+        self.queue = queue.Queue(backlog)
+        self.error = None
+        # The schema is created before returning, so a bad path fails here
+        # rather than in the writer thread.
+        connect(path).close()
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+
+    def add(self, row):
+        rows = self.rows
+        rows.append(row)
+        if len(rows) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.queue.put(self.rows)
+            self.rows = []
+
+    def sync(self):
+        self.flush()
+        self.queue.join()
+
+    def close(self):
+        '''Writes the remaining rows, raising any error of the writer.'''
+        if self.thread.is_alive():
+            self.flush()
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def write(self):
+        # Connections are only open while a batch is written, since SQLite
+        # connections must not be open across a fork of the process.
+        while True:
+            rows = self.queue.get()
+            if rows is None:
+                self.queue.task_done()
+                break
+            if self.error is None:
+                try:
+                    connection = connect(self.path)
+                    try:
+                        with connection:
+                            connection.executemany(INSERT, rows)
+                    finally:
+                        connection.close()
+                except sqlite3.Error as e:
+                    # Keep draining the queue so add never blocks forever.
+                    self.error = e
+            self.queue.task_done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def summary(path):
+    '''Per configuration statistics of the sessions stored at path.
+
+    Returns:
+        list : (strategy, table limit, stake, sessions, mean duration,
+            mean maximum, mean final stake) ordered by configuration
+    '''
+    connection = connect(path)
+    try:
+        return connection.execute('''
+            SELECT strategy, table_limit, stake, count(*), avg(duration),
+                   avg(maximum), avg(final_stake)
+            FROM sessions GROUP BY strategy, table_limit, stake
+            ORDER BY strategy, table_limit, stake''').fetchall()
+    finally:
+        connection.close()